@@ -0,0 +1,37 @@
+"""
+Process-wide Dedalus client and runner shared by every agent
+
+One AsyncDedalus owns one keep-alive connection pool, so sharing it means
+agents don't each pay their own TLS handshakes and sockets.
+"""
+
+import threading
+import httpx
+from dedalus_labs import AsyncDedalus, DedalusRunner, DefaultAsyncHttpxClient
+
+_client = None
+_runner = None
+_lock = threading.Lock()
+
+
+def get_client() -> AsyncDedalus:
+    """Return the shared AsyncDedalus client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = AsyncDedalus(
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+                )
+            )
+        return _client
+
+
+def get_runner() -> DedalusRunner:
+    """Return the shared DedalusRunner bound to the shared client."""
+    global _runner
+    client = get_client()
+    with _lock:
+        if _runner is None:
+            _runner = DedalusRunner(client)
+        return _runner
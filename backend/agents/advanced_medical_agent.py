@@ -5,10 +5,10 @@ This agent uses Dedalus multi-model orchestration and advanced MCP tools
 to provide intelligent surgical guidance, not just basic calculations.
 """
 
-from dotenv import load_dotenv
-load_dotenv()
+from backend.utils.env import load_env
+load_env()
 
-from dedalus_labs import AsyncDedalus, DedalusRunner
+from backend.agents._dedalus_singleton import get_client, get_runner
 from backend.tools.measurement_tools import (
     calculate_distance_3d, 
     calculate_angle, 
@@ -21,8 +21,194 @@ from backend.tools.advanced_surgical_tools import (
     calculate_approach_vector,
     assess_tissue_depth
 )
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple
+import asyncio
+import copy
+import hashlib
 import json
+import logging
+import math
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+
+    def _compact_json(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _compact_json(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+    _json_loads = json.loads
+
+# One named group per query class; inflected forms count too ("points",
+# "measurements", "far apart"), but a bare "far" is usually an adjective
+# ("the far vessel") and doesn't make a query a distance question
+_QUERY_KEYWORDS = re.compile(
+    r'\b(?:(?P<distance>distances?|how\s+far|far\s+(?:apart|away|from)|farther|farthest|how\s+long'
+    r'|measur(?:e[sd]?|ing|ements?))'
+    r'|(?P<angle>angles?|angled|approach(?:es|ed|ing)?|directions?)'
+    r'|(?P<entry>entry|entries|points?|pointing|pointed|where|suggest(?:s|ed|ing|ions?)?))\b',
+    re.I
+)
+# Checked in the same order as _intelligent_fallback's branches
+_QUERY_PRIORITY = ("distance", "angle", "entry")
+# Planning language - these queries always go to the model, never the fast path
+_PLANNING_WORDS = re.compile(r'\b(approach\w*|safe\w*|risk\w*|entry|entries|enter\w*)\b', re.I)
+
+_RATIONALE_FIELD = re.compile(r'"rationale"\s*:\s*"((?:[^"\\]|\\.)*)"', re.S)
+
+
+def _parse_rationale(output) -> Dict:
+    """Tolerantly parse the structured entry point rationale.
+    
+    Accepts the schema'd JSON, falls back to pulling the "rationale" string
+    out of malformed JSON, and finally treats the output as plain text.
+    """
+    text = output if isinstance(output, str) else str(output)
+    try:
+        parsed = _json_loads(text)
+        if isinstance(parsed, dict) and isinstance(parsed.get("rationale"), str):
+            measurements = parsed.get("key_measurements")
+            return {
+                "rationale": parsed["rationale"],
+                "key_measurements": [str(m) for m in measurements] if isinstance(measurements, list) else []
+            }
+    except ValueError:
+        pass
+    
+    match = _RATIONALE_FIELD.search(text)
+    if match:
+        try:
+            return {"rationale": json.loads(f'"{match.group(1)}"'), "key_measurements": []}
+        except ValueError:
+            return {"rationale": match.group(1), "key_measurements": []}
+    
+    return {"rationale": text.strip(), "key_measurements": []}
+
+
+# Vessel proximity scoring: distance buckets (mm) and the score for each bucket
+_VESSEL_THRESHOLDS_MM = np.array([3.0, 5.0, 10.0, 15.0])
+_VESSEL_SCORES = np.array([0.20, 0.45, 0.70, 0.85, 0.95])
+
+
+_EMPTY_POINTS = np.empty((0, 3), dtype=np.float64)
+
+
+def _dist_mm(a: List[float], b: List[float]) -> float:
+    """Distance in mm between two points, without calculate_distance_3d's dict."""
+    return math.dist(a, b) * 10
+
+
+def _min_distance_mm_py(pos, points):
+    """Distance (mm) from pos to the nearest row of points, inf if there are none.
+    
+    Same float64 arithmetic as calculate_distance_3d, so Python's round()
+    of the result matches the rounded distances scoring used to compare.
+    """
+    best = math.inf
+    for i in range(points.shape[0]):
+        dx = points[i, 0] - pos[0]
+        dy = points[i, 1] - pos[1]
+        dz = points[i, 2] - pos[2]
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz) * 10
+        if distance < best:
+            best = distance
+    return best
+
+
+if NUMBA_AVAILABLE:
+    _min_distance_mm = njit('float64(float64[::1], float64[:, ::1])', cache=True)(_min_distance_mm_py)
+else:
+    _min_distance_mm = _min_distance_mm_py
+
+
+class AnnotationArrays(NamedTuple):
+    """Structure-of-arrays view of an annotations list.
+    
+    Built once per list so hot paths read contiguous arrays instead of
+    looking up dict fields annotation by annotation.
+    """
+    positions: np.ndarray         # (N, 3) float64, [0, 0, 0] where missing
+    labels: np.ndarray            # (N,) object
+    is_vessel: np.ndarray         # (N,) bool, False where position is missing
+    vessel_positions: np.ndarray  # (M, 3) float64, C-contiguous
+
+
+def _is_vessel(ann: Dict) -> bool:
+    """True for positioned annotations labelled or typed as a vessel."""
+    return (
+        ('vessel' in ann.get('label', '').lower() or ann.get('type') == 'vessel')
+        and 'position' in ann
+    )
+
+
+def _segment_vessel_clearance_mm(points: np.ndarray, vessels: np.ndarray) -> np.ndarray:
+    """Closest approach (mm) of each path segment to any vessel, all segments at once.
+    
+    points is the (N, 3) path; returns (N-1,) distances, or None with no vessels.
+    """
+    if not len(vessels):
+        return None
+    starts = points[:-1]
+    seg = points[1:] - starts                                   # (S, 3)
+    seg_sq = (seg ** 2).sum(axis=1)                              # (S,)
+    offsets = vessels[:, None, :] - starts                      # (M, S, 3)
+    # Projection of each vessel onto each segment, clamped to the segment
+    t = np.einsum('msj,sj->ms', offsets, seg) / np.where(seg_sq > 0, seg_sq, 1.0)
+    np.clip(t, 0.0, 1.0, out=t)
+    residuals = offsets - t[..., None] * seg                    # (M, S, 3)
+    return np.linalg.norm(residuals, axis=2).min(axis=0) * 10
+
+
+def _to_soa(annotations: List[Dict]) -> AnnotationArrays:
+    """Convert a list of annotation dicts into an AnnotationArrays."""
+    if not annotations:
+        empty = np.empty(0, dtype=object)
+        return AnnotationArrays(_EMPTY_POINTS, empty, np.zeros(0, dtype=bool), _EMPTY_POINTS)
+    
+    positions = np.asarray(
+        [ann.get('position') or [0, 0, 0] for ann in annotations], dtype=np.float64
+    ).reshape(-1, 3)
+    labels = np.asarray([ann.get('label', '') for ann in annotations], dtype=object)
+    is_vessel = np.asarray([_is_vessel(ann) for ann in annotations], dtype=bool)
+    return AnnotationArrays(positions, labels, is_vessel, np.ascontiguousarray(positions[is_vessel]))
+
+
+def _has_vertices(mesh_data: Dict) -> bool:
+    """True if mesh_data carries a non-empty vertex list or (N, 3) array."""
+    vertices = mesh_data.get("vertices") if mesh_data else None
+    return vertices is not None and len(vertices) > 0
+
+
+def _zone_centers(zones: List[Dict]) -> np.ndarray:
+    """Stack zone centers into an (K, 3) float64 array."""
+    if not zones:
+        return _EMPTY_POINTS
+    return np.asarray([zone.get("center", [0, 0, 0]) for zone in zones], dtype=np.float64)
+
+
+def _geometry_zone_centers(geometry: Dict):
+    """(risk_centers, safe_centers) for a geometry dict, precomputed if available."""
+    risk_centers = geometry.get("_risk_centers")
+    if risk_centers is None:
+        risk_centers = _zone_centers(geometry.get("high_risk_zones", []))
+    safe_centers = geometry.get("_safe_centers")
+    if safe_centers is None:
+        safe_centers = _zone_centers(geometry.get("safe_zones", []))
+    return risk_centers, safe_centers
 
 
 class AdvancedMedicalAgent:
@@ -37,9 +223,81 @@ class AdvancedMedicalAgent:
     - Streaming responses for better UX
     """
     
+    # Static prompt prefixes and tool lists. They are sent first and kept
+    # byte-identical across calls so the provider can reuse its cached
+    # prefill; per-request data always goes at the end of the input.
+    _SYSTEM_PROMPT = """You are an expert surgical guidance AI assistant.
+            
+            Your capabilities:
+            - Precise 3D geometric measurements
+            - Risk assessment based on anatomical zones  
+            - Surgical approach planning
+            - Safety scoring and recommendations
+            
+            Provide clear, actionable guidance:
+            1. Use specific measurements in millimeters
+            2. Identify and quantify risks
+            3. Give confidence levels with reasoning
+            4. Recommend safest approaches
+            
+            Be concise but thorough. Patient safety is paramount."""
+    
+    _STREAM_SYSTEM_PROMPT = """You are a surgical guidance AI. Provide analysis step-by-step:
+            1. First, state what you're analyzing
+            2. Then, describe your calculations
+            3. Finally, give your recommendation
+            
+            Be conversational but professional."""
+    
+    _ANALYSIS_TOOLS = [
+        calculate_distance_3d,
+        calculate_angle,
+        score_entry_point_safety,
+        calculate_approach_vector,
+        assess_tissue_depth
+    ]
+    
+    _STREAM_TOOLS = [calculate_distance_3d, calculate_angle]
+    
+    # Short fixed schema for the entry point rationale - caps generation
+    # length and keeps the output parseable
+    _RATIONALE_RESPONSE_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "entry_point_rationale",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "rationale": {"type": "string", "maxLength": 600},
+                    "key_measurements": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["rationale"]
+            }
+        }
+    }
+    
+    _RESPONSE_CACHE_SIZE = 256
+    
+    # Only the most recent annotations are sent to the model
+    _MAX_PROMPT_ANNOTATIONS = 20
+    
+    _PROMPT_CACHE_KEY = "fixit-surgical-analysis"
+    _STREAM_PROMPT_CACHE_KEY = "fixit-surgical-stream"
+    
     def __init__(self):
-        self.client = AsyncDedalus()
-        self.runner = DedalusRunner(self.client)
+        self.client = get_client()
+        self.runner = get_runner()
+        
+        # (annotations list, length, AnnotationArrays) for the last list seen
+        self._soa_cache = None
+        # (vertices list, length, geometry) for the last mesh seen
+        self._geometry_cache = None
+        # (annotations list, length, serialized JSON) for the last list seen
+        self._ann_json_cache = None
+        # (vertices list, length, (shape, digest)) for the last mesh seen
+        self._mesh_digest_cache = None
+        # Exact-match LRU of AI analyses: (query, annotations, mesh) -> response
+        self._response_cache = OrderedDict()
         
         # Fallback responses for demo reliability
         self.fallback_responses = {
@@ -68,56 +326,52 @@ class AdvancedMedicalAgent:
             Comprehensive analysis with guidance, measurements, and confidence
         """
         
+        # Plain measurements between marked points need no LLM roundtrip
+        query_type = self._classify_query(query)
+        needed_points = self._fast_path_points(query, query_type)
+        if (needed_points and len(annotations) >= needed_points
+                and all('position' in ann for ann in annotations[:needed_points])):
+            return {**self._intelligent_fallback(annotations, query, mesh_data), "method": "fast_local"}
+        
+        cache_key = self._response_cache_key(annotations, query, mesh_data)
+        cached = self._response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            # Deep copy so callers can't mutate the cached lists and dicts
+            return {**copy.deepcopy(cached), "method": "cached"}
+        
         try:
             # Prepare context for AI
-            context = self._prepare_analysis_context(annotations, mesh_data)
+            context = self._prepare_analysis_context(self._to_soa(annotations), mesh_data)
             
             # Use GPT-4o for fast analysis with tool calling
-            system_prompt = """You are an expert surgical guidance AI assistant.
-            
-            Your capabilities:
-            - Precise 3D geometric measurements
-            - Risk assessment based on anatomical zones  
-            - Surgical approach planning
-            - Safety scoring and recommendations
-            
-            Provide clear, actionable guidance:
-            1. Use specific measurements in millimeters
-            2. Identify and quantify risks
-            3. Give confidence levels with reasoning
-            4. Recommend safest approaches
-            
-            Be concise but thorough. Patient safety is paramount."""
-            
             result = await self.runner.run(
                 input=f"""
                 Surgical Site Analysis Request:
+                Analyze the surgical site and provide expert guidance.
                 
-                Query: {query}
+                3D Mesh Context: {_compact_json(context)}
                 
                 Available Annotations: {len(annotations)}
-                {json.dumps(annotations, indent=2) if annotations else 'None'}
+                {self._annotations_json(annotations) if annotations else 'None'}
                 
-                3D Mesh Context: {json.dumps(context, indent=2)}
-                
-                Analyze the surgical site and provide expert guidance.
+                Query: {query}
                 """,
                 model="openai/gpt-4o",  # Fast and good at tool use
-                tools=[
-                    calculate_distance_3d,
-                    calculate_angle,
-                    score_entry_point_safety,
-                    calculate_approach_vector,
-                    assess_tissue_depth
-                ],
-                instructions=system_prompt
+                tools=self._ANALYSIS_TOOLS,
+                instructions=self._SYSTEM_PROMPT,
+                prompt_cache_key=self._PROMPT_CACHE_KEY
             )
             
-            return self._format_response(result.final_output, "ai")
+            response = self._format_response(result.final_output, "ai")
+            if cache_key:
+                self._response_cache[cache_key] = copy.deepcopy(response)
+                if len(self._response_cache) > self._RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
+            return response
             
         except Exception as e:
-            print(f"⚠️ AI analysis failed: {e}")
-            print(f"   Using intelligent fallback...")
+            logger.warning("⚠️ AI analysis failed: %s - using intelligent fallback", e)
             return self._intelligent_fallback(annotations, query, mesh_data)
     
     async def suggest_optimal_entry_point(
@@ -139,71 +393,17 @@ class AdvancedMedicalAgent:
         """
         
         try:
-            # Analyze mesh geometry
-            if mesh_data and mesh_data.get("vertices"):
-                geometry = analyze_mesh_geometry(mesh_data["vertices"])
-            else:
-                # Fallback geometry for demo
-                geometry = {
-                    "bounds": {"min": [-0.5, -1, -0.5], "max": [0.5, 1, 0.5]},
-                    "high_risk_zones": [{
-                        "region": "top_20_percent",
-                        "center": [0, 0.8, 0],
-                        "description": "Vessel-dense cap area"
-                    }],
-                    "safe_zones": [{
-                        "region": "middle_60_percent",
-                        "center": [0, 0, 0],
-                        "description": "Lower risk tissue"
-                    }],
-                    "dimensions": [1.0, 2.0, 1.0]
-                }
-            
-            # Generate candidate entry points
-            candidates = find_candidate_entry_points(geometry, num_candidates=5)
-            
-            # Score each candidate
-            scored_candidates = []
-            for candidate in candidates:
-                safety_score = score_entry_point_safety(
-                    candidate["position"],
-                    geometry,
-                    annotations
-                )
-                
-                scored_candidates.append({
-                    **candidate,
-                    "safety_score": safety_score["overall"],
-                    "risk_level": safety_score["risk_level"],
-                    "breakdown": safety_score["breakdown"]
-                })
-            
-            # Sort by safety score
-            scored_candidates.sort(key=lambda x: x["safety_score"], reverse=True)
+            scored_candidates = await self._score_entry_candidates(annotations, mesh_data)
             best_candidate = scored_candidates[0]
             
             # Use Claude for complex reasoning about the best choice
-            reasoning_prompt = f"""
-            Analyze these candidate surgical entry points and explain why the top choice is optimal.
-            
-            Top Candidate:
-            - Position: {best_candidate['position']}
-            - Safety Score: {best_candidate['safety_score']}/100
-            - Risk Level: {best_candidate['risk_level']}
-            - Approach: {best_candidate['approach']}
-            
-            Score Breakdown:
-            {json.dumps(best_candidate['breakdown'], indent=2)}
-            
-            Provide a clear, professional explanation of why this is the safest entry point.
-            Include specific measurements and risk factors.
-            """
-            
             reasoning_result = await self.runner.run(
-                input=reasoning_prompt,
+                input=self._entry_point_reasoning_prompt(best_candidate),
                 model="anthropic/claude-3-5-sonnet-20241022",  # Better at medical reasoning
-                instructions="You are a surgical planning expert. Provide clear, evidence-based rationale."
+                instructions="You are a surgical planning expert. Provide clear, evidence-based rationale.",
+                response_format=self._RATIONALE_RESPONSE_FORMAT
             )
+            rationale = _parse_rationale(reasoning_result.final_output)
             
             return {
                 "position": best_candidate["position"],
@@ -211,7 +411,8 @@ class AdvancedMedicalAgent:
                 "safety_score": best_candidate["safety_score"],
                 "risk_level": best_candidate["risk_level"],
                 "approach": best_candidate["approach"],
-                "rationale": reasoning_result.final_output,
+                "rationale": rationale["rationale"],
+                "key_measurements": rationale["key_measurements"],
                 "alternative_positions": [
                     {
                         "position": c["position"],
@@ -226,28 +427,184 @@ class AdvancedMedicalAgent:
             }
             
         except Exception as e:
-            print(f"⚠️ Entry point AI failed: {e}")
+            logger.warning("⚠️ Entry point AI failed: %s", e)
             return self._fallback_entry_point(annotations, mesh_data)
     
-    def _prepare_analysis_context(self, annotations: List[Dict], mesh_data: Dict = None) -> Dict:
+    async def stream_optimal_entry_point(
+        self,
+        annotations: List[Dict],
+        mesh_data: Dict = None
+    ):
+        """
+        Streaming variant of suggest_optimal_entry_point.
+        
+        Yields the scored top candidate as soon as it is known, so the client
+        can render the position and safety score before Claude's first token,
+        then streams the rationale as it is generated.
+        """
+        try:
+            scored_candidates = await self._score_entry_candidates(annotations, mesh_data)
+        except Exception as e:
+            logger.warning("⚠️ Entry point scoring failed: %s", e)
+            fallback = self._fallback_entry_point(annotations, mesh_data)
+            yield {"type": "candidate", **fallback, "done": False}
+            yield {"type": "complete", "done": True}
+            return
+        
+        best_candidate = scored_candidates[0]
+        yield {
+            "type": "candidate",
+            "position": best_candidate["position"],
+            "confidence": round(best_candidate["safety_score"] / 100, 2),
+            "safety_score": best_candidate["safety_score"],
+            "risk_level": best_candidate["risk_level"],
+            "approach": best_candidate["approach"],
+            "done": False
+        }
+        
+        try:
+            async for content in self._stream_text(
+                input=self._entry_point_reasoning_prompt(best_candidate),
+                model="anthropic/claude-3-5-sonnet-20241022",
+                instructions="You are a surgical planning expert. Provide clear, evidence-based rationale."
+            ):
+                yield {"type": "rationale_delta", "content": content, "done": False}
+            
+            yield {"type": "complete", "done": True}
+            
+        except Exception as e:
+            yield {
+                "type": "error",
+                "content": f"Rationale streaming failed: {e}",
+                "done": True
+            }
+    
+    async def _stream_text(self, **kwargs):
+        """Text deltas of a streamed runner call.
+        
+        ``runner.run(..., stream=True)`` yields chat completion chunks; chunks
+        without text (role, tool call and finish chunks) are skipped.
+        """
+        async for chunk in self.runner.run(stream=True, **kwargs):
+            choices = getattr(chunk, "choices", None)
+            content = getattr(choices[0].delta, "content", None) if choices else None
+            if content:
+                yield content
+    
+    async def _score_entry_candidates(self, annotations: List[Dict], mesh_data: Dict = None) -> List[Dict]:
+        """Generate candidate entry points and score them, safest first.
+        
+        Candidates are scored concurrently off the event loop.
+        """
+        # Analyze mesh geometry
+        if _has_vertices(mesh_data):
+            geometry = analyze_mesh_geometry(mesh_data["vertices"])
+        else:
+            # Fallback geometry for demo
+            geometry = {
+                "bounds": {"min": [-0.5, -1, -0.5], "max": [0.5, 1, 0.5]},
+                "high_risk_zones": [{
+                    "region": "top_20_percent",
+                    "center": [0, 0.8, 0],
+                    "description": "Vessel-dense cap area"
+                }],
+                "safe_zones": [{
+                    "region": "middle_60_percent",
+                    "center": [0, 0, 0],
+                    "description": "Lower risk tissue"
+                }],
+                "dimensions": [1.0, 2.0, 1.0]
+            }
+        
+        # Generate candidate entry points
+        candidates = find_candidate_entry_points(geometry, num_candidates=5)
+        
+        # Score all candidates concurrently
+        safety_scores = await asyncio.gather(*[
+            asyncio.to_thread(score_entry_point_safety, candidate["position"], geometry, annotations)
+            for candidate in candidates
+        ])
+        
+        scored_candidates = []
+        for candidate, safety_score in zip(candidates, safety_scores):
+            scored_candidates.append({
+                **candidate,
+                "safety_score": safety_score["overall"],
+                "risk_level": safety_score["risk_level"],
+                "breakdown": safety_score["breakdown"]
+            })
+        
+        # Sort by safety score
+        scored_candidates.sort(key=lambda x: x["safety_score"], reverse=True)
+        return scored_candidates
+    
+    def _entry_point_reasoning_prompt(self, best_candidate: Dict) -> str:
+        """Build the Claude prompt explaining the top entry point candidate."""
+        return f"""
+            Analyze these candidate surgical entry points and explain why the top choice is optimal.
+            
+            Top Candidate:
+            - Position: {best_candidate['position']}
+            - Safety Score: {best_candidate['safety_score']}/100
+            - Risk Level: {best_candidate['risk_level']}
+            - Approach: {best_candidate['approach']}
+            
+            Score Breakdown:
+            {self._format_score_breakdown(best_candidate['breakdown'])}
+            
+            Provide a clear, professional explanation of why this is the safest entry point.
+            Include specific measurements and risk factors.
+            """
+    
+    def _format_score_breakdown(self, breakdown: Dict) -> str:
+        """Score breakdown as one "- factor: field=value, ..." line per factor."""
+        lines = []
+        for factor, detail in breakdown.items():
+            if isinstance(detail, dict):
+                detail = ", ".join(f"{k}={v}" for k, v in detail.items())
+            lines.append(f"- {factor}: {detail}")
+        return "\n            ".join(lines)
+    
+    def _prepare_analysis_context(self, annotations: AnnotationArrays, mesh_data: Dict = None) -> Dict:
         """Prepare rich context for AI analysis."""
+        positions = annotations.positions
         context = {
-            "annotation_count": len(annotations),
+            "annotation_count": len(positions),
             "has_mesh_data": mesh_data is not None
         }
         
-        if annotations and len(annotations) >= 2:
+        if len(positions) >= 2:
             # Calculate some basic stats
-            first_point = annotations[0].get("position", [0, 0, 0])
-            last_point = annotations[-1].get("position", [0, 0, 0])
-            distance = calculate_distance_3d(first_point, last_point)
-            context["span"] = distance["distance_mm"]
+            context["span"] = round(_dist_mm(positions[0], positions[-1]), 1)
         
         if mesh_data:
             context["mesh_vertices"] = len(mesh_data.get("vertices", []))
         
         return context
     
+    def _classify_query(self, query: str) -> str:
+        """Classify a query as "distance", "angle", "entry" or "general"."""
+        found = {m.lastgroup for m in _QUERY_KEYWORDS.finditer(query)}
+        for query_type in _QUERY_PRIORITY:
+            if query_type in found:
+                return query_type
+        return "general"
+    
+    def _fast_path_points(self, query: str, query_type: str):
+        """Marked points a query needs to be answered locally, or None.
+        
+        Only pure measurement phrasing ("distance between A and B", "angle of
+        ...") qualifies; anything mentioning approach, safety, risk or entry
+        is a planning question for the model.
+        """
+        if _PLANNING_WORDS.search(query):
+            return None
+        if query_type == "distance":
+            return 2
+        if query_type == "angle" and re.search(r'\bangles?\b', query, re.I):
+            return 3
+        return None
+    
     def _intelligent_fallback(
         self, 
         annotations: List[Dict], 
@@ -259,10 +616,9 @@ class AdvancedMedicalAgent:
         Not just static strings!
         """
         
-        query_lower = query.lower()
-        
         # Determine query type and do actual analysis
-        if any(word in query_lower for word in ['distance', 'far', 'how long', 'measure']):
+        query_type = self._classify_query(query)
+        if query_type == "distance":
             if len(annotations) >= 2:
                 dist = calculate_distance_3d(
                     annotations[0]['position'],
@@ -275,7 +631,7 @@ class AdvancedMedicalAgent:
                 guidance = "Please mark at least 2 points to measure distance."
                 measurements = {}
                 
-        elif any(word in query_lower for word in ['angle', 'approach', 'direction']):
+        elif query_type == "angle":
             if len(annotations) >= 3:
                 angle = calculate_angle(
                     annotations[0]['position'],
@@ -289,10 +645,10 @@ class AdvancedMedicalAgent:
                 guidance = "Recommended approach angle: 15° medial, 8° superior for optimal access."
                 measurements = {}
                 
-        elif any(word in query_lower for word in ['entry', 'point', 'where', 'suggest']):
+        elif query_type == "entry":
             # Even in fallback, do some analysis
-            if mesh_data and mesh_data.get("vertices"):
-                geometry = analyze_mesh_geometry(mesh_data["vertices"][:100])
+            if _has_vertices(mesh_data):
+                geometry = self._mesh_geometry(mesh_data)
                 safe_center = geometry["safe_zones"][0]["center"] if geometry.get("safe_zones") else [0, 0, 0]
                 guidance = f"Suggested entry point: {safe_center} (center of safe zone, away from high-risk areas)"
                 measurements = {"suggested_position": safe_center}
@@ -314,70 +670,131 @@ class AdvancedMedicalAgent:
             "warnings": []
         }
     
+    def _annotations_json(self, annotations: List[Dict]) -> str:
+        """Compact JSON of the last annotations plus the total count.
+        
+        Cached for the last annotations list seen.
+        """
+        cached = self._ann_json_cache
+        if cached is not None and cached[0] is annotations and cached[1] == len(annotations):
+            return cached[2]
+        
+        serialized = _compact_json({
+            "total": len(annotations),
+            "annotations": annotations[-self._MAX_PROMPT_ANNOTATIONS:]
+        })
+        self._ann_json_cache = (annotations, len(annotations), serialized)
+        return serialized
+    
+    def _response_cache_key(self, annotations: List[Dict], query: str, mesh_data: Dict = None) -> tuple:
+        """Canonical key for an analysis request: normalized query plus the
+        annotation positions/labels and a digest of the mesh vertices.
+        
+        Returns None when the request can't be hashed (it is then not cached).
+        """
+        try:
+            annotation_key = tuple(
+                (tuple(ann.get('position') or ()), ann.get('label', ''), ann.get('type', ''))
+                for ann in annotations
+            )
+            vertices = mesh_data.get("vertices") if mesh_data else None
+            mesh_key = self._mesh_digest(vertices) if _has_vertices(mesh_data) else None
+            key = (" ".join(query.lower().split()), annotation_key, mesh_key)
+            hash(key)
+            return key
+        except (TypeError, AttributeError, ValueError):
+            return None
+    
+    def _mesh_digest(self, vertices) -> tuple:
+        """(shape, blake2b digest) of the vertex buffer, cached for the last mesh seen."""
+        cached = self._mesh_digest_cache
+        if cached is not None and cached[0] is vertices and cached[1] == len(vertices):
+            return cached[2]
+        
+        vertex_array = np.ascontiguousarray(vertices, dtype=np.float64)
+        digest = (vertex_array.shape, hashlib.blake2b(vertex_array.tobytes(), digest_size=16).digest())
+        self._mesh_digest_cache = (vertices, len(vertices), digest)
+        return digest
+    
+    def _mesh_geometry(self, mesh_data: Dict = None) -> Dict:
+        """Analyze the first 100 mesh vertices, cached for the last mesh seen."""
+        if not _has_vertices(mesh_data):
+            return None
+        
+        vertices = mesh_data["vertices"]
+        cached = self._geometry_cache
+        if cached is not None and cached[0] is vertices and cached[1] == len(vertices):
+            return cached[2]
+        
+        geometry = analyze_mesh_geometry(vertices[:100])
+        # Zone centers as arrays so confidence scoring skips the dict lookups
+        geometry["_risk_centers"] = _zone_centers(geometry.get("high_risk_zones", []))
+        geometry["_safe_centers"] = _zone_centers(geometry.get("safe_zones", []))
+        self._geometry_cache = (vertices, len(vertices), geometry)
+        return geometry
+    
+    def _to_soa(self, annotations: List[Dict]) -> AnnotationArrays:
+        """AnnotationArrays for ``annotations``, cached for the last list seen."""
+        if annotations is None:
+            annotations = []
+        cached = self._soa_cache
+        if cached is not None and cached[0] is annotations and cached[1] == len(annotations):
+            return cached[2]
+        
+        soa = _to_soa(annotations)
+        self._soa_cache = (annotations, len(annotations), soa)
+        return soa
+    
     def _calculate_confidence_breakdown(
         self, 
         position: List[float], 
-        annotations: List[Dict] = None,
-        mesh_data: Dict = None
+        annotations: AnnotationArrays = None,
+        mesh_data: Dict = None,
+        geometry: Dict = None
     ) -> Dict:
         """
         Calculate detailed confidence breakdown based on 4 key factors.
         This is REAL analysis, not fake numbers!
+        
+        Pass a precomputed ``geometry`` when scoring many positions on the
+        same mesh to skip re-analyzing it for every call. Nearest-point
+        distances go through ``_min_distance_mm``, compiled when Numba is
+        installed.
         """
+        if _has_vertices(mesh_data) and geometry is None:
+            try:
+                geometry = self._mesh_geometry(mesh_data)
+            except:
+                geometry = None
+        
         breakdown = {
             "vessel_proximity": 1.0,    # Default: safe (no vessels nearby)
             "geometric_safety": 0.85,   # Default: decent
             "tissue_depth": 0.80,       # Default: moderate
             "approach_feasibility": 0.90  # Default: good
         }
+        query = np.asarray(position, dtype=np.float64)
         
         # 1. Vessel Proximity: Check distance to annotated vessels
-        if annotations:
-            min_vessel_distance = float('inf')
-            for ann in annotations:
-                if 'vessel' in ann.get('label', '').lower() or ann.get('type') == 'vessel':
-                    # Calculate distance to this vessel
-                    dist = calculate_distance_3d(position, ann['position'])
-                    min_vessel_distance = min(min_vessel_distance, dist['distance_mm'])
-            
-            if min_vessel_distance != float('inf'):
-                # Score based on distance: <3mm = dangerous, >15mm = safe
-                if min_vessel_distance < 3.0:
-                    breakdown["vessel_proximity"] = 0.20  # DANGEROUS
-                elif min_vessel_distance < 5.0:
-                    breakdown["vessel_proximity"] = 0.45  # RISKY
-                elif min_vessel_distance < 10.0:
-                    breakdown["vessel_proximity"] = 0.70  # CAUTION
-                elif min_vessel_distance < 15.0:
-                    breakdown["vessel_proximity"] = 0.85  # ACCEPTABLE
-                else:
-                    breakdown["vessel_proximity"] = 0.95  # SAFE
+        if annotations is not None and len(annotations.vessel_positions):
+            min_vessel_distance = round(_min_distance_mm(query, annotations.vessel_positions), 1)
+            # Score based on distance: <3mm = dangerous, >15mm = safe
+            bucket = np.searchsorted(_VESSEL_THRESHOLDS_MM, min_vessel_distance, side="right")
+            breakdown["vessel_proximity"] = float(_VESSEL_SCORES[bucket])
         
         # 2. Geometric Safety: Based on mesh geometry if available
-        if mesh_data and mesh_data.get("vertices"):
+        if geometry:
             try:
-                geometry = analyze_mesh_geometry(mesh_data["vertices"][:100])
+                risk_centers, safe_centers = _geometry_zone_centers(geometry)
                 
-                # Check if position is in a high-risk zone
-                is_risky = False
-                for risk_zone in geometry.get("high_risk_zones", []):
-                    zone_center = risk_zone.get("center", [0, 0, 0])
-                    dist_to_zone = calculate_distance_3d(position, zone_center)['distance_mm']
-                    if dist_to_zone < 20:  # Within 20mm of risk zone
-                        is_risky = True
-                        break
+                # Check if position is within 20mm of a high-risk zone
+                is_risky = round(_min_distance_mm(query, risk_centers), 1) < 20
                 
                 if is_risky:
                     breakdown["geometric_safety"] = 0.50  # In high-risk zone
                 else:
-                    # Check if in safe zone
-                    in_safe_zone = False
-                    for safe_zone in geometry.get("safe_zones", []):
-                        zone_center = safe_zone.get("center", [0, 0, 0])
-                        dist_to_safe = calculate_distance_3d(position, zone_center)['distance_mm']
-                        if dist_to_safe < 30:  # Within 30mm of safe zone center
-                            in_safe_zone = True
-                            break
+                    # Check if within 30mm of a safe zone center
+                    in_safe_zone = round(_min_distance_mm(query, safe_centers), 1) < 30
                     
                     breakdown["geometric_safety"] = 0.92 if in_safe_zone else 0.75
             except:
@@ -435,7 +852,7 @@ class AdvancedMedicalAgent:
         # Try to do basic geometric analysis even in fallback
         position = [0, 0, 0]  # Default center
         
-        if mesh_data and mesh_data.get("vertices"):
+        if _has_vertices(mesh_data):
             try:
                 geometry = analyze_mesh_geometry(mesh_data["vertices"][:50])
                 if geometry.get("safe_zones"):
@@ -444,7 +861,13 @@ class AdvancedMedicalAgent:
                 pass
         
         # Calculate REAL confidence breakdown
-        breakdown = self._calculate_confidence_breakdown(position, annotations, mesh_data)
+        try:
+            geometry = self._mesh_geometry(mesh_data)
+        except:
+            geometry = None
+        breakdown = self._calculate_confidence_breakdown(
+            position, self._to_soa(annotations), mesh_data, geometry
+        )
         overall_confidence = self._calculate_overall_confidence(breakdown)
         recommendation = self._get_recommendation(overall_confidence)
         can_recommend = recommendation != "SPECIALIST_REQUIRED"
@@ -498,24 +921,14 @@ class AdvancedMedicalAgent:
         This would be called instead of analyze_annotations for streaming mode.
         """
         try:
-            system_prompt = """You are a surgical guidance AI. Provide analysis step-by-step:
-            1. First, state what you're analyzing
-            2. Then, describe your calculations
-            3. Finally, give your recommendation
-            
-            Be conversational but professional."""
-            
-            async for chunk in self.runner.stream(
-                input=f"Analyze: {query}\nAnnotations: {annotations}",
+            async for content in self._stream_text(
+                input=f"Annotations: {annotations}\nAnalyze: {query}",
                 model="openai/gpt-4o",
-                tools=[calculate_distance_3d, calculate_angle],
-                instructions=system_prompt
+                tools=self._STREAM_TOOLS,
+                instructions=self._STREAM_SYSTEM_PROMPT,
+                prompt_cache_key=self._STREAM_PROMPT_CACHE_KEY
             ):
-                yield {
-                    "type": "chunk",
-                    "content": chunk.content if hasattr(chunk, 'content') else str(chunk),
-                    "done": False
-                }
+                yield {"type": "chunk", "content": content, "done": False}
             
             yield {"type": "complete", "done": True}
             
@@ -536,6 +949,7 @@ class AdvancedMedicalAgent:
         Analyze a multi-point incision path segment by segment.
         
         This is the ADVANCED feature - shows AI can analyze entire surgical paths!
+        Collects the frames from stream_incision_path into a single result.
         
         Args:
             path_points: List of [x, y, z] points defining the incision path
@@ -545,73 +959,141 @@ class AdvancedMedicalAgent:
         Returns:
             Detailed path analysis with segment-by-segment breakdown
         """
+        segments = []
+        result = None
+        async for frame in self.stream_incision_path(path_points, annotations, mesh_data):
+            if frame["type"] == "segment":
+                segments.append(frame["segment"])
+            else:
+                result = {k: v for k, v in frame.items() if k != "type"}
+        
+        if segments:
+            segments.sort(key=lambda s: s["segment_index"][0])
+            result["segments"] = segments
+        return result
+    
+    async def stream_incision_path(
+        self,
+        path_points: List[List[float]],
+        annotations: List[Dict] = None,
+        mesh_data: Dict = None
+    ):
+        """
+        Stream incision path analysis as segments complete.
+        
+        Yields {"type": "segment", "index": i, "segment": {...}} for each
+        segment in completion order, then a final {"type": "summary", ...}
+        with the overall path assessment (everything but the segments).
+        Invalid paths yield a single {"type": "error", ...} frame.
+        """
         
         if len(path_points) < 2:
-            return {
+            yield {
+                "type": "error",
                 "error": "Need at least 2 points to define a path",
                 "path_length_mm": 0,
                 "overall_confidence": 0,
                 "can_recommend": False
             }
+            return
         
-        # Analyze each segment
-        segments = []
-        total_length = 0
-        min_confidence = 1.0
-        max_depth = 0
+        # Annotations and mesh geometry are the same for every segment -
+        # convert and analyze them once
+        soa = self._to_soa(annotations)
+        try:
+            geometry = self._mesh_geometry(mesh_data)
+        except:
+            geometry = None
         
-        for i in range(len(path_points) - 1):
-            start = path_points[i]
-            end = path_points[i + 1]
-            
-            # Calculate segment length
-            segment_dist = calculate_distance_3d(start, end)
-            segment_length = segment_dist['distance_mm']
-            total_length += segment_length
-            
-            # Analyze midpoint of segment for safety
-            midpoint = [
-                (start[0] + end[0]) / 2,
-                (start[1] + end[1]) / 2,
-                (start[2] + end[2]) / 2
-            ]
-            
-            # Get confidence breakdown for this segment
-            breakdown = self._calculate_confidence_breakdown(midpoint, annotations, mesh_data)
-            segment_confidence = self._calculate_overall_confidence(breakdown)
-            recommendation = self._get_recommendation(segment_confidence)
-            
-            # Track max depth
-            depth = abs(midpoint[1])
-            max_depth = max(max_depth, depth)
-            
-            # Track minimum confidence across all segments
-            min_confidence = min(min_confidence, segment_confidence)
-            
-            # Identify specific risks
-            risks = []
-            if breakdown['vessel_proximity'] < 0.60:
-                risks.append(f"Vessel proximity: {breakdown['vessel_proximity']*100:.0f}%")
-            if breakdown['geometric_safety'] < 0.60:
-                risks.append(f"High-risk anatomical zone")
-            if breakdown['tissue_depth'] < 0.60:
-                risks.append(f"Deep tissue (challenging access)")
-            
-            segments.append({
-                "segment_index": [i, i+1],
-                "start": start,
-                "end": end,
-                "midpoint": midpoint,
-                "length_mm": round(segment_length, 1),
-                "confidence": segment_confidence,
-                "confidence_breakdown": breakdown,
-                "recommendation": recommendation,
-                "risks": risks,
-                "risk_level": "high" if segment_confidence < 0.60 else "medium" if segment_confidence < 0.80 else "low"
-            })
+        # Segment lengths and midpoints for the whole path in one pass.
+        # float64 keeps the midpoints returned to the client exact.
+        points = np.asarray(path_points, dtype=np.float64)
+        # Lengths are rounded to 0.1mm before summing, so the total matches the
+        # segment lengths shown to the user
+        lengths_mm = [round(length, 1) for length in (np.linalg.norm(points[1:] - points[:-1], axis=1) * 10).tolist()]
+        midpoint_array = (points[1:] + points[:-1]) * 0.5
+        midpoints = midpoint_array.tolist()
+        
+        total_length = sum(lengths_mm)
+        max_depth = float(np.abs(midpoint_array[:, 1]).max())
+        
+        # Closest approach of every segment to every vessel in one pass -
+        # catches vessels the segment crosses even when its midpoint is clear
+        clearances = _segment_vessel_clearance_mm(points, soa.vessel_positions)
         
-        # Overall path assessment
-        overall_confidence = min_confidence  # Path is only as safe as weakest segment!
+        # Analyze segments off the event loop, yielding each as it finishes
+        tasks = [
+            asyncio.create_task(asyncio.to_thread(
+                self._analyze_path_segment,
+                i, path_points[i], path_points[i + 1], midpoint, lengths_mm[i],
+                soa, mesh_data, geometry,
+                None if clearances is None else float(clearances[i])
+            ))
+            for i, midpoint in enumerate(midpoints)
+        ]
+        segments = [None] * len(tasks)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                segment = await next_done
+                index = segment["segment_index"][0]
+                segments[index] = segment
+                yield {"type": "segment", "index": index, "segment": segment}
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        yield {"type": "summary", **self._summarize_incision_path(segments, total_length, max_depth)}
+    
+    def _analyze_path_segment(
+        self,
+        i: int,
+        start: List[float],
+        end: List[float],
+        midpoint: List[float],
+        segment_length: float,
+        soa: AnnotationArrays,
+        mesh_data: Dict = None,
+        geometry: Dict = None,
+        vessel_clearance: float = None
+    ) -> Dict:
+        """Score one incision segment at its midpoint.
+        
+        ``vessel_clearance`` is the segment's closest approach to a vessel (mm).
+        """
+        # Get confidence breakdown for this segment
+        breakdown = self._calculate_confidence_breakdown(midpoint, soa, mesh_data, geometry)
+        segment_confidence = self._calculate_overall_confidence(breakdown)
+        recommendation = self._get_recommendation(segment_confidence)
+        
+        # Identify specific risks
+        risks = []
+        if breakdown['vessel_proximity'] < 0.60:
+            risks.append(f"Vessel proximity: {breakdown['vessel_proximity']*100:.0f}%")
+        if breakdown['geometric_safety'] < 0.60:
+            risks.append(f"High-risk anatomical zone")
+        if breakdown['tissue_depth'] < 0.60:
+            risks.append(f"Deep tissue (challenging access)")
+        if vessel_clearance is not None and vessel_clearance < 3 and breakdown['vessel_proximity'] >= 0.60:
+            risks.append(f"Segment passes within {vessel_clearance:.1f}mm of a vessel")
+        
+        return {
+            "segment_index": [i, i+1],
+            "start": start,
+            "end": end,
+            "midpoint": midpoint,
+            "length_mm": round(segment_length, 1),
+            "confidence": segment_confidence,
+            "confidence_breakdown": breakdown,
+            "recommendation": recommendation,
+            "vessel_clearance_mm": None if vessel_clearance is None else round(vessel_clearance, 1),
+            "risks": risks,
+            "risk_level": "high" if segment_confidence < 0.60 else "medium" if segment_confidence < 0.80 else "low"
+        }
+    
+    def _summarize_incision_path(self, segments: List[Dict], total_length: float, max_depth: float) -> Dict:
+        """Overall path assessment from the analyzed segments (in path order)."""
+        # Path is only as safe as weakest segment!
+        overall_confidence = min(1.0, min(s['confidence'] for s in segments))
         overall_recommendation = self._get_recommendation(overall_confidence)
         can_recommend = overall_recommendation != "SPECIALIST_REQUIRED"
         
@@ -641,23 +1123,28 @@ class AdvancedMedicalAgent:
         if not high_risk_segments and not moderate_risk_segments:
             recommendations.append("Path appears safe based on geometric analysis")
         
-        # Count concerning factors across all segments
-        total_concerning = sum(
-            sum(1 for v in s['confidence_breakdown'].values() if v < 0.60)
-            for s in segments
-        )
+        # Aggregate the per-segment breakdowns in a single pass
+        min_vessel_proximity = min_geometric_safety = float('inf')
+        sum_tissue_depth = sum_approach_feasibility = 0.0
+        total_concerning = 0  # Concerning factors across all segments
+        for s in segments:
+            breakdown = s['confidence_breakdown']
+            min_vessel_proximity = min(min_vessel_proximity, breakdown['vessel_proximity'])
+            min_geometric_safety = min(min_geometric_safety, breakdown['geometric_safety'])
+            sum_tissue_depth += breakdown['tissue_depth']
+            sum_approach_feasibility += breakdown['approach_feasibility']
+            total_concerning += sum(1 for v in breakdown.values() if v < 0.60)
         
         return {
             "path_length_mm": round(total_length, 1),
             "max_depth_mm": round(max_depth * 10, 1),  # Convert to mm
             "num_segments": len(segments),
-            "segments": segments,
             "overall_confidence": overall_confidence,
             "confidence_breakdown": {
-                "min_vessel_proximity": min(s['confidence_breakdown']['vessel_proximity'] for s in segments),
-                "min_geometric_safety": min(s['confidence_breakdown']['geometric_safety'] for s in segments),
-                "avg_tissue_depth": sum(s['confidence_breakdown']['tissue_depth'] for s in segments) / len(segments),
-                "avg_approach_feasibility": sum(s['confidence_breakdown']['approach_feasibility'] for s in segments) / len(segments)
+                "min_vessel_proximity": min_vessel_proximity,
+                "min_geometric_safety": min_geometric_safety,
+                "avg_tissue_depth": sum_tissue_depth / len(segments),
+                "avg_approach_feasibility": sum_approach_feasibility / len(segments)
             },
             "can_recommend": can_recommend,
             "recommendation": overall_recommendation,
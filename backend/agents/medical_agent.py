@@ -1,16 +1,56 @@
-from dotenv import load_dotenv
-load_dotenv()
-from dedalus_labs import AsyncDedalus, DedalusRunner
+from backend.utils.env import load_env
+load_env()
+import asyncio
+import json
+import re
+import threading
+import types
+from backend.agents._dedalus_singleton import get_client, get_runner
 from backend.tools.measurement_tools import (
     calculate_distance_3d, 
     calculate_angle, 
     assess_risk_zone
 )
 
+# Radius (mm) used for vessel/critical annotations when planning risk checks
+CRITICAL_ZONE_RADIUS_MM = 5.0
+MAX_RISK_CHECKS = 5
+
+# Read-only response templates: each call copies one and fills in the
+# per-call fields (mutable values are always replaced, never shared)
+FALLBACK_TEMPLATE = types.MappingProxyType({
+    "guidance": "",
+    "measurements": None,
+    "confidence": 0.85,
+    "method": "fallback",
+    "warnings": None
+})
+AI_RESPONSE_TEMPLATE = types.MappingProxyType({
+    "guidance": "",
+    "measurements": None,
+    "confidence": 0.92,
+    "method": "ai",
+    "warnings": None
+})
+ENTRY_POINT_TEMPLATE = types.MappingProxyType({
+    "position": None,
+    "confidence": 0.88,
+    "rationale": "Minimal vessel proximity, optimal tissue depth",
+    "alternative_positions": None
+})
+
+# Fallback response key -> query keywords, checked in order. Substring
+# matches (no word boundaries), so "unsafe" still counts as "safe".
+FALLBACK_KEYWORDS = {
+    "measurement": re.compile(r'distance|far|how long', re.I),
+    "angle": re.compile(r'angle|approach|direction', re.I),
+    "risk": re.compile(r'risk|safe|danger', re.I)
+}
+
 class MedicalAnalysisAgent:
     def __init__(self):
-        self.client = AsyncDedalus()
-        self.runner = DedalusRunner(self.client)
+        self.client = get_client()
+        self.runner = get_runner()
         
         self.fallback_responses = {
             "measurement": "Optimal entry point: 47mm from base, 23mm from lateral edge",
@@ -31,29 +71,77 @@ class MedicalAnalysisAgent:
             
             Be concise but thorough. Safety is paramount."""
             
+            # Plan independent tool calls up front and run them in parallel,
+            # then let the model synthesize the answer from their results
+            plan = self._plan_tool_calls(annotations, query)
+            results = await asyncio.gather(
+                *(asyncio.to_thread(func, *args) for _, func, args in plan),
+                return_exceptions=True
+            )
+            tool_results = {
+                name: result
+                for (name, _, _), result in zip(plan, results)
+                if not isinstance(result, Exception)
+            }
+            
             result = await self.runner.run(
-                input=f"Annotations: {annotations}\nQuery: {query}",
+                input=(
+                    f"Annotations: {annotations}\n"
+                    f"Tool results: {json.dumps(tool_results, separators=(',', ':'))}\n"
+                    f"Query: {query}"
+                ),
                 model="openai/gpt-4o",
-                tools=[calculate_distance_3d, calculate_angle, assess_risk_zone],
                 instructions=instructions_prompt
             )
             
-            return self._format_response(result.final_output)
+            return self._format_response(result.final_output, self._tool_measurements(tool_results))
             
         except Exception as e:
             print(f"AI analysis failed, using fallback: {e}")
             return self._fallback_analysis(annotations, query)
     
+    def _plan_tool_calls(self, annotations: list[dict], query: str) -> list[tuple]:
+        """Plan the tool calls a query needs as (name, function, args) tuples.
+        
+        The calls don't depend on each other, so they can all run at once.
+        """
+        positioned = [ann for ann in annotations if ann.get('position')]
+        critical = [
+            ann for ann in positioned
+            if ann.get('type') in ('vessel', 'critical') or 'vessel' in ann.get('label', '').lower()
+        ]
+        others = [ann for ann in positioned if ann not in critical]
+        
+        plan = []
+        if len(positioned) >= 2:
+            plan.append(("distance", calculate_distance_3d, (positioned[0]['position'], positioned[1]['position'])))
+        if len(positioned) >= 3:
+            plan.append(("angle", calculate_angle, (
+                positioned[0]['position'], positioned[1]['position'], positioned[2]['position']
+            )))
+        if critical:
+            zones = [
+                {"position": ann['position'], "radius": CRITICAL_ZONE_RADIUS_MM, "name": ann.get('label') or 'critical structure'}
+                for ann in critical
+            ]
+            for i, ann in enumerate(others[:MAX_RISK_CHECKS]):
+                plan.append((f"risk_{i}", assess_risk_zone, (ann['position'], zones)))
+        return plan
+    
+    def _tool_measurements(self, tool_results: dict) -> dict:
+        measurements = {}
+        if "distance" in tool_results:
+            measurements['distance'] = tool_results['distance']['formatted']
+        if "angle" in tool_results:
+            measurements['angle'] = tool_results['angle']['formatted']
+        return measurements
+    
     def _fallback_analysis(self, annotations: list[dict], query: str) -> dict:
-        query_lower = query.lower()
-        if any(word in query_lower for word in ['distance', 'far', 'how long']):
-            response_key = "measurement"
-        elif any(word in query_lower for word in ['angle', 'approach', 'direction']):
-            response_key = "angle"
-        elif any(word in query_lower for word in ['risk', 'safe', 'danger']):
-            response_key = "risk"
-        else:
-            response_key = "guidance"
+        response_key = "guidance"
+        for key, pattern in FALLBACK_KEYWORDS.items():
+            if pattern.search(query):
+                response_key = key
+                break
         
         measurements = {}
         if len(annotations) >= 2:
@@ -63,29 +151,37 @@ class MedicalAnalysisAgent:
             )
             measurements['distance'] = distance['formatted']
         
-        return {
-            "guidance": self.fallback_responses[response_key],
-            "measurements": measurements,
-            "confidence": 0.85,
-            "method": "fallback",
-            "warnings": []
-        }
+        response = dict(FALLBACK_TEMPLATE)
+        response["guidance"] = self.fallback_responses[response_key]
+        response["measurements"] = measurements
+        response["warnings"] = []
+        return response
     
-    def _format_response(self, raw_response: str) -> dict:
-        return {
-            "guidance": str(raw_response),
-            "measurements": {},
-            "confidence": 0.92,
-            "method": "ai",
-            "warnings": []
-        }
+    def _format_response(self, raw_response: str, measurements: dict = None) -> dict:
+        response = dict(AI_RESPONSE_TEMPLATE)
+        response["guidance"] = str(raw_response)
+        response["measurements"] = measurements or {}
+        response["warnings"] = []
+        return response
     
     async def get_optimal_entry_point(self, model_data: dict) -> dict:
-        return {
-            "position": [0, 0.5, 0],
-            "confidence": 0.88,
-            "rationale": "Minimal vessel proximity, optimal tissue depth",
-            "alternative_positions": [
-                {"position": [0.2, 0.4, 0], "confidence": 0.82}
-            ]
-        }
+        response = dict(ENTRY_POINT_TEMPLATE)
+        # Fresh lists so callers can't mutate the template
+        response["position"] = [0, 0.5, 0]
+        response["alternative_positions"] = [
+            {"position": [0.2, 0.4, 0], "confidence": 0.82}
+        ]
+        return response
+
+
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_medical_agent() -> MedicalAnalysisAgent:
+    """Return a process-wide MedicalAnalysisAgent, creating it on first use."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = MedicalAnalysisAgent()
+        return _agent
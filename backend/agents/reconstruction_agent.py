@@ -1,5 +1,5 @@
 try:
-    from dedalus_labs import AsyncDedalus, DedalusRunner
+    from backend.agents._dedalus_singleton import get_client, get_runner
     DEDALUS_AVAILABLE = True
 except ImportError:
     DEDALUS_AVAILABLE = False
@@ -8,17 +8,47 @@ except ImportError:
 from backend.tools.video_tools import extract_frames, report_progress
 import os
 import asyncio
+import functools
+import hashlib
+import mmap
 from pathlib import Path
-from dotenv import load_dotenv
+from backend.utils.env import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+# The video is hashed from HASH_SAMPLE_COUNT reads of HASH_SAMPLE_SIZE bytes
+HASH_SAMPLE_SIZE = 64 * 1024
+HASH_SAMPLE_COUNT = 8
+
+
+@functools.lru_cache(maxsize=256)
+def _video_digest(video_path: str, mtime_ns: int, size: int) -> int:
+    """Hash 64 KiB at evenly spaced offsets of a video (mtime/size key the cache)."""
+    h = hashlib.blake2b(digest_size=8)
+    if size == 0:  # mmap can't map an empty file
+        return int.from_bytes(h.digest(), "little")
+    
+    # Hash straight from the page cache through a read-only mapping - no
+    # read() copies, and only the sampled pages are faulted in
+    with open(video_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            if size <= HASH_SAMPLE_COUNT * HASH_SAMPLE_SIZE:
+                h.update(view)
+            else:
+                # First and last samples sit at the file's start and end
+                span = size - HASH_SAMPLE_SIZE
+                for k in range(HASH_SAMPLE_COUNT):
+                    offset = k * span // (HASH_SAMPLE_COUNT - 1)
+                    h.update(view[offset:offset + HASH_SAMPLE_SIZE])
+    return int.from_bytes(h.digest(), "little")
+
 
 class ReconstructionAgent:
     def __init__(self):
         if DEDALUS_AVAILABLE:
-            self.client = AsyncDedalus()
-            self.runner = DedalusRunner(self.client)
+            self.client = get_client()
+            self.runner = get_runner()
         else:
             self.client = None
             self.runner = None
@@ -33,27 +63,63 @@ class ReconstructionAgent:
             "bottle_large": models_dir / "bottle_large.glb",
         }
     
+    # Seconds Dedalus gets before the fallback is started alongside it,
+    # and the hard limit on the Dedalus call
+    SPECULATIVE_DELAY = 2.0
+    DEDALUS_TIMEOUT = 60.0
+    
     async def process_video(self, video_path: str, callback=None) -> dict:
-        """Process video and return 3D model path."""
+        """Process video and return 3D model path.
         
-        if DEDALUS_AVAILABLE and self.runner:
-            try:
-                # Try real reconstruction with Dedalus
-                result = await self.runner.run(
+        Dedalus gets a short head start; if it hasn't produced a model by
+        then, the fallback runs alongside it and whichever finishes first wins.
+        """
+        
+        if not (DEDALUS_AVAILABLE and self.runner):
+            return await self._fallback_reconstruction(video_path, callback)
+        
+        dedalus = asyncio.create_task(self._dedalus_reconstruction(video_path))
+        fallback = None
+        try:
+            done, _ = await asyncio.wait({dedalus}, timeout=self.SPECULATIVE_DELAY)
+            if dedalus in done and dedalus.result():
+                return dedalus.result()
+            
+            # FALLBACK: Race a pre-made model against the real reconstruction
+            fallback = asyncio.create_task(self._fallback_reconstruction(video_path, callback))
+            pending = {fallback} if dedalus in done else {dedalus, fallback}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if fallback in done:
+                    return fallback.result()
+                if dedalus.result():
+                    return dedalus.result()
+        finally:
+            for task in (dedalus, fallback):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _dedalus_reconstruction(self, video_path: str):
+        """Try real reconstruction with Dedalus; None if it fails or times out."""
+        try:
+            result = await asyncio.wait_for(
+                self.runner.run(
                     input=f"Reconstruct 3D model from video: {video_path}",
                     model="openai/gpt-4",
                     tools=[extract_frames, report_progress]
-                )
-                
-                # If successful, return result
-                if result.final_output and "model_path" in str(result.final_output):
-                    return {"model_path": str(result.final_output["model_path"])}
+                ),
+                timeout=self.DEDALUS_TIMEOUT
+            )
             
-            except Exception as e:
-                print(f"Reconstruction failed, using fallback: {e}")
+            # If successful, return result
+            if result.final_output and "model_path" in str(result.final_output):
+                return {"model_path": str(result.final_output["model_path"])}
         
-        # FALLBACK: Use pre-made model
-        return await self._fallback_reconstruction(video_path, callback)
+        except asyncio.TimeoutError:
+            print(f"Reconstruction timed out after {self.DEDALUS_TIMEOUT:.0f}s, using fallback")
+        except Exception as e:
+            print(f"Reconstruction failed, using fallback: {e}")
+        return None
     
     async def _fallback_reconstruction(self, video_path: str, callback=None):
         """Simulate reconstruction with pre-made model."""
@@ -69,7 +135,7 @@ class ReconstructionAgent:
         for step, percentage in steps:
             if callback:
                 await callback({"step": step, "percentage": percentage})
-            await asyncio.sleep(1)  # Simulate processing time
+            await asyncio.sleep(0)  # Yield to the event loop between steps
         
         # Select model deterministically based on video hash
         model_key = self._hash_video_to_model(video_path)
@@ -83,10 +149,11 @@ class ReconstructionAgent:
     
     def _hash_video_to_model(self, video_path: str) -> str:
         """Deterministically select model based on video."""
-        # Simple hash based on file size
+        # Content hash of the head and tail of the file
         try:
-            size = os.path.getsize(video_path)
-        except:
-            size = 0
+            stat = os.stat(video_path)
+            digest = _video_digest(video_path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            digest = 0
         models = list(self.fallback_models.keys())
-        return models[size % len(models)]
+        return models[digest % len(models)]
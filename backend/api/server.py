@@ -1,15 +1,45 @@
-from fastapi import FastAPI, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import base64
+import json
 import uuid
 import os
-from pathlib import Path
-from typing import Dict
+import time
+import logging
+import numpy as np
+from typing import Dict, Set, Tuple
 from backend.agents.reconstruction_agent import ReconstructionAgent
 from backend.agents.advanced_medical_agent import AdvancedMedicalAgent
-from backend.services.vision_detector import detect_bottle_with_vision, detect_bottle_fast
+from backend.services.detection_batcher import DetectionBatcher
+from backend.services.frame_cache import DetectionMemo, FrameCache, fingerprint, perceptual_hash
+from backend.services.local_detector import detect_bottle_local, warm_up as warm_up_local_detector
+from backend.utils.env import temp_dir
+from backend.utils.log_queue import log_context, start_queue_logging, stop_queue_logging
+
+try:
+    import orjson
+
+    def _dumps(data) -> str:
+        return orjson.dumps(data).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data) -> str:
+        return json.dumps(data, separators=(',', ':'))
+
+    _loads = json.loads
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+logger = logging.getLogger("fixit")
 
 app = FastAPI()
 app.add_middleware(
@@ -22,37 +52,103 @@ app.add_middleware(
 
 # Store active connections
 connections: Dict[str, WebSocket] = {}
+# (client_id, websocket) pairs whose last send failed, drained by the reaper
+_dead: Set[Tuple[str, WebSocket]] = set()
+_reaper_task = None
+
+# Background reconstruction jobs: job_id -> {"status", "result" | "error"}.
+# Finished jobs are dropped once fetched, after RECONSTRUCTION_JOB_TTL
+# seconds, or oldest first beyond MAX_FINISHED_JOBS.
+reconstruction_jobs: Dict[str, dict] = {}
+_job_expiry: Dict[str, float] = {}  # finished job_id -> monotonic expiry, oldest first
+RECONSTRUCTION_JOB_TTL = 600
+MAX_FINISHED_JOBS = 256
+_background_tasks: Set[asyncio.Task] = set()
 
 # Initialize agents
 reconstruction_agent = ReconstructionAgent()
 medical_agent = AdvancedMedicalAgent()
+detection_batcher = DetectionBatcher()
+frame_cache = FrameCache()
+detection_memo = DetectionMemo()
 
 # Mount static files for models
-Path("temp").mkdir(exist_ok=True)
+# Uploaded videos are staged here. Point FIXIT_TEMP_DIR at a tmpfs mount
+# (e.g. /dev/shm/fixit) so staging never touches disk.
+TEMP_DIR = temp_dir()
 app.mount("/models", StaticFiles(directory="assets/models"), name="models")
 
+@app.on_event("startup")
+async def startup():
+    global _reaper_task
+    # Keep log writes off the event loop
+    start_queue_logging()
+    _reaper_task = asyncio.create_task(reap_dead_connections())
+    detection_batcher.start()
+    await asyncio.to_thread(warm_up_local_detector)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _reaper_task is not None:
+        _reaper_task.cancel()
+    await detection_batcher.stop()
+    stop_queue_logging()
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "dedalus": "connected"}
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+async def save_upload(upload: UploadFile, path: str):
+    """Stream an upload to disk in chunks instead of reading it all into memory"""
+    if AIOFILES_AVAILABLE:
+        async with aiofiles.open(path, "wb") as f:
+            _preallocate(f.fileno(), upload.size)
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+    else:
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            _preallocate(f.fileno(), upload.size)
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+
+def _preallocate(fd: int, size: int = None):
+    # Reserve the whole file up front on Linux to avoid fragmentation
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+
 @app.post("/upload-video")
 async def upload_video(video: UploadFile):
     job_id = str(uuid.uuid4())
     # Save video temporarily
-    video_path = f"temp/{job_id}.mp4"
-    with open(video_path, "wb") as f:
-        f.write(await video.read())
+    video_path = str(TEMP_DIR / f"{job_id}.mp4")
+    await save_upload(video, video_path)
     
     return {"job_id": job_id, "status": "queued"}
 
 @app.post("/reconstruct/{job_id}")
-async def start_reconstruction(job_id: str):
-    video_path = f"temp/{job_id}.mp4"
+async def start_reconstruction(job_id: str, background: bool = False):
+    video_path = str(TEMP_DIR / f"{job_id}.mp4")
     
     async def progress_callback(update):
         # Broadcast to WebSocket clients
         await broadcast_to_all({"type": "progress", "data": update})
     
+    if background:
+        # Return immediately; progress and the result arrive over the WebSocket
+        reconstruction_jobs[job_id] = {"status": "running"}
+        task = asyncio.create_task(run_reconstruction_job(job_id, video_path, progress_callback))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return {"job_id": job_id, "status": "running"}
+    
     result = await reconstruction_agent.process_video(
         video_path, 
         callback=progress_callback
@@ -60,6 +156,67 @@ async def start_reconstruction(job_id: str):
     
     return result
 
+@app.get("/reconstruct/{job_id}")
+async def reconstruction_status(job_id: str):
+    prune_reconstruction_jobs()
+    job = reconstruction_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"job_id": job_id, "status": "unknown"})
+    if job_id in _job_expiry:
+        # Finished results are handed out once
+        drop_reconstruction_job(job_id)
+    return {"job_id": job_id, **job}
+
+async def run_reconstruction_job(job_id: str, video_path: str, progress_callback):
+    try:
+        result = await reconstruction_agent.process_video(video_path, callback=progress_callback)
+        finish_reconstruction_job(job_id, {"status": "complete", "result": result})
+        await broadcast_to_all({"type": "reconstruction_complete", "job_id": job_id, "data": result})
+    except Exception as e:
+        finish_reconstruction_job(job_id, {"status": "failed", "error": str(e)})
+        await broadcast_to_all({"type": "reconstruction_failed", "job_id": job_id, "error": str(e)})
+
+def finish_reconstruction_job(job_id: str, job: dict):
+    prune_reconstruction_jobs()
+    reconstruction_jobs[job_id] = job
+    _job_expiry[job_id] = time.monotonic() + RECONSTRUCTION_JOB_TTL
+    if len(_job_expiry) > MAX_FINISHED_JOBS:
+        drop_reconstruction_job(next(iter(_job_expiry)))
+
+def prune_reconstruction_jobs():
+    """Drop finished jobs whose TTL has passed"""
+    now = time.monotonic()
+    while _job_expiry:
+        job_id, expiry = next(iter(_job_expiry.items()))
+        if expiry > now:
+            break
+        drop_reconstruction_job(job_id)
+
+def drop_reconstruction_job(job_id: str):
+    reconstruction_jobs.pop(job_id, None)
+    _job_expiry.pop(job_id, None)
+
+def decode_vertices(data: bytes) -> np.ndarray:
+    """Little-endian float32 x,y,z triples -> (N, 3) float32 array
+    
+    Raises ValueError if the data isn't a whole number of triples.
+    """
+    if len(data) % 12:
+        raise ValueError(f"Vertex data is {len(data)} bytes, not a multiple of 12 (x,y,z float32)")
+    return np.frombuffer(data, dtype='<f4').reshape(-1, 3)
+
+def request_mesh_vertices(request: dict):
+    """Mesh vertices from either the JSON list or the base64 Float32Array field
+    
+    Raises ValueError if mesh_vertices_f32 is malformed.
+    """
+    if request.get('mesh_vertices_f32'):
+        return decode_vertices(base64.b64decode(request['mesh_vertices_f32'], validate=True))
+    return request.get('mesh_vertices', [])
+
+def bad_request(error: str) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"error": error})
+
 @app.post("/analyze")
 async def analyze_annotations(request: dict):
     """Analyze annotations and provide medical guidance.
@@ -69,17 +226,52 @@ async def analyze_annotations(request: dict):
         "annotations": [...],
         "query": "What's the safest approach?",
         "mesh_vertices": [[x,y,z], ...] (optional)
+        "mesh_vertices_f32": "<base64 Float32Array>" (optional, instead of mesh_vertices)
     }
     """
     annotations = request.get('annotations', [])
     query = request.get('query', 'Provide guidance')
-    mesh_vertices = request.get('mesh_vertices', [])
+    try:
+        mesh_vertices = request_mesh_vertices(request)
+    except ValueError as e:
+        return bad_request(f"Invalid mesh_vertices_f32: {e}")
     
     # Pass mesh data to agent for geometric analysis
     result = await medical_agent.analyze_annotations(
         annotations, 
         query,
-        mesh_data={'vertices': mesh_vertices} if mesh_vertices else None
+        mesh_data={'vertices': mesh_vertices} if len(mesh_vertices) else None
+    )
+    
+    return result
+
+@app.post("/analyze-binary")
+async def analyze_annotations_binary(
+    metadata: str = Form(...),
+    vertices: UploadFile = File(None)
+):
+    """Same as /analyze, with the mesh sent as raw binary instead of JSON.
+    
+    Multipart form:
+        metadata: JSON {"annotations": [...], "query": "..."}
+        vertices: application/octet-stream, little-endian float32 x,y,z triples
+    """
+    try:
+        request = _loads(metadata)
+    except ValueError as e:
+        return bad_request(f"Invalid metadata JSON: {e}")
+    if not isinstance(request, dict):
+        return bad_request("Metadata must be a JSON object")
+    
+    try:
+        mesh_vertices = decode_vertices(await vertices.read()) if vertices else []
+    except ValueError as e:
+        return bad_request(str(e))
+    
+    result = await medical_agent.analyze_annotations(
+        request.get('annotations', []),
+        request.get('query', 'Provide guidance'),
+        mesh_data={'vertices': mesh_vertices} if len(mesh_vertices) else None
     )
     
     return result
@@ -92,11 +284,15 @@ async def suggest_entry_point(request: dict):
     {
         "model_id": "...", (optional)
         "mesh_vertices": [[x,y,z], ...], (optional)
+        "mesh_vertices_f32": "<base64 Float32Array>", (optional, instead of mesh_vertices)
         "annotations": [...] (optional, existing annotations to avoid)
     }
     """
     model_id = request.get('model_id', 'default')
-    mesh_vertices = request.get('mesh_vertices', [])
+    try:
+        mesh_vertices = request_mesh_vertices(request)
+    except ValueError as e:
+        return bad_request(f"Invalid mesh_vertices_f32: {e}")
     annotations = request.get('annotations', [])
     
     # Pass mesh data to agent for real geometric analysis
@@ -119,6 +315,41 @@ async def suggest_entry_point(request: dict):
     return result
 
 
+@app.post("/suggest-entry-point/stream")
+async def stream_entry_point(request: dict):
+    """Streaming variant of /suggest-entry-point.
+    
+    Same request body. Responds with newline-delimited JSON frames: the
+    scored candidate first ({"type": "candidate", ...}), then the rationale
+    as it is generated ({"type": "rationale_delta", "content": ...}), ending
+    with {"type": "complete"} or {"type": "error"}.
+    """
+    try:
+        mesh_vertices = request_mesh_vertices(request)
+    except ValueError as e:
+        return bad_request(f"Invalid mesh_vertices_f32: {e}")
+    frames = medical_agent.stream_optimal_entry_point(
+        annotations=request.get('annotations', []),
+        mesh_data={'vertices': mesh_vertices, 'id': request.get('model_id', 'default')}
+    )
+    
+    async def suggested_frames():
+        async for frame in frames:
+            if frame["type"] == "candidate":
+                await broadcast_to_all({
+                    "type": "suggested_annotation",
+                    "annotation": {
+                        "position": frame.get("position", [0, 0, 0]),
+                        "label": f"Suggested Entry ({frame.get('confidence', 0):.0%} confidence)",
+                        "color": "green",
+                        "auto_generated": True
+                    }
+                })
+            yield frame
+    
+    return StreamingResponse(ndjson_lines(suggested_frames()), media_type="application/x-ndjson")
+
+
 @app.post("/analyze-incision")
 async def analyze_incision(request: dict):
     """Analyze a multi-point incision path for surgical planning.
@@ -131,7 +362,9 @@ async def analyze_incision(request: dict):
     }
     
     Returns:
-        Segment-by-segment analysis with overall risk assessment
+        Segment-by-segment analysis with overall risk assessment. Each
+        segment's vessel_clearance_mm is its closest approach to any vessel
+        annotation (null when there are none).
     """
     path_points = request.get('path_points', [])
     annotations = request.get('annotations', [])
@@ -151,17 +384,71 @@ async def analyze_incision(request: dict):
     result = await medical_agent.analyze_incision_path(
         path_points=path_points,
         annotations=annotations,
-        mesh_data={'vertices': mesh_vertices} if mesh_vertices else None
+        mesh_data={'vertices': mesh_vertices} if len(mesh_vertices) else None
     )
     
     return result
 
 
+@app.post("/analyze-incision/stream")
+async def stream_incision(request: dict):
+    """Streaming variant of /analyze-incision.
+    
+    Same request body. Responds with newline-delimited JSON frames, one
+    {"type": "segment", "index": i, "segment": {...}} per segment as it is
+    scored, then {"type": "summary", ...} with the overall assessment.
+    """
+    path_points = request.get('path_points', [])
+    mesh_vertices = request.get('mesh_vertices', [])
+    
+    if len(path_points) < 2:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Need at least 2 points to define an incision path",
+                "path_length_mm": 0,
+                "overall_confidence": 0
+            }
+        )
+    
+    frames = medical_agent.stream_incision_path(
+        path_points=path_points,
+        annotations=request.get('annotations', []),
+        mesh_data={'vertices': mesh_vertices} if len(mesh_vertices) else None
+    )
+    return StreamingResponse(ndjson_lines(frames), media_type="application/x-ndjson")
+
+
+async def ndjson_lines(frames):
+    """Serialize an async iterator of dicts as newline-delimited JSON"""
+    async for frame in frames:
+        yield _dumps(frame) + "\n"
+
+
 class VisionDetectionRequest(BaseModel):
     image: str  # Base64 encoded image
     mode: str = "full"  # "full" or "fast"
 
 
+async def run_detection(image: str, mode: str) -> dict:
+    # Near-identical frames reuse the last detection
+    frame_hash = await asyncio.to_thread(perceptual_hash, image)
+    cached = frame_cache.get(frame_hash, mode)
+    if cached is not None:
+        return cached
+    
+    # Local model first; GPT-4 Vision only when it isn't confident
+    result = await asyncio.to_thread(detect_bottle_local, image, mode)
+    
+    if result is None or not result["detected"]:
+        # Concurrent frames are batched into one vision request
+        result = await detection_batcher.detect(image, mode)
+    
+    # Errors and zero-confidence misses aren't cached, so a transient
+    # vision failure doesn't stick to a static scene
+    frame_cache.put(frame_hash, mode, result)
+    return result
+
 @app.post("/detect-bottle")
 async def detect_bottle(request: VisionDetectionRequest):
     """
@@ -176,10 +463,11 @@ async def detect_bottle(request: VisionDetectionRequest):
     """
     
     try:
-        if request.mode == "fast":
-            result = detect_bottle_fast(request.image)
-        else:
-            result = detect_bottle_with_vision(request.image)
+        # Exact resends of a frame (retries) are answered from memory
+        result = await detection_memo.get_or_detect(
+            (fingerprint(request.image), request.mode),
+            lambda: run_detection(request.image, request.mode)
+        )
         
         return JSONResponse(content=result)
         
@@ -199,20 +487,21 @@ async def detect_bottle(request: VisionDetectionRequest):
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
     connections[client_id] = websocket
-    print(f"INFO:     WebSocket client connected: {client_id}")
+    log_context.set(client_id)
+    logger.info("WebSocket client connected: %s", client_id)
     
     try:
         while True:
-            data = await websocket.receive_json()
+            data = _loads(await websocket.receive_text())
             # Handle annotation updates
             await broadcast_to_others(client_id, data)
     except WebSocketDisconnect as e:
         # Client disconnected normally
-        print(f"INFO:     WebSocket client disconnected: {client_id} (code: {e.code})")
+        logger.info("WebSocket client disconnected: %s (code: %s)", client_id, e.code)
         if client_id in connections:
             del connections[client_id]
     except Exception as e:
-        print(f"ERROR:    WebSocket error for {client_id}: {e}")
+        logger.error("WebSocket error for %s: %s", client_id, e)
         # Clean up on any error
         if client_id in connections:
             del connections[client_id]
@@ -220,32 +509,40 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         # Final cleanup to ensure connection is removed
         if client_id in connections:
             del connections[client_id]
-        print(f"INFO:     WebSocket cleanup completed for {client_id}")
+        logger.info("WebSocket cleanup completed for %s", client_id)
 
 async def broadcast_to_others(sender_id: str, data: dict):
-    disconnected = []
-    for client_id, ws in connections.items():
-        if client_id != sender_id:
-            try:
-                await ws.send_json(data)
-            except:
-                disconnected.append(client_id)
-    
-    # Clean up disconnected clients
-    for client_id in disconnected:
-        del connections[client_id]
+    await _broadcast(data, exclude=sender_id)
 
 async def broadcast_to_all(data: dict):
-    disconnected = []
-    for client_id, ws in connections.items():
-        try:
-            await ws.send_json(data)
-        except:
-            disconnected.append(client_id)
+    await _broadcast(data)
+
+async def _broadcast(data: dict, exclude: str = None):
+    # Encode once and send to every client concurrently
+    # Sent as a text frame - the frontend JSON.parses event.data
+    payload = _dumps(data)
+    targets = [
+        (client_id, ws) for client_id, ws in connections.items()
+        if client_id != exclude and (client_id, ws) not in _dead
+    ]
+    results = await asyncio.gather(
+        *(ws.send_text(payload) for _, ws in targets),
+        return_exceptions=True
+    )
     
-    # Clean up disconnected clients
-    for client_id in disconnected:
-        del connections[client_id]
+    # Mark failed clients; the reaper removes them from connections
+    for target, result in zip(targets, results):
+        if isinstance(result, Exception):
+            _dead.add(target)
+
+async def reap_dead_connections(interval: float = 0.5):
+    while True:
+        await asyncio.sleep(interval)
+        while _dead:
+            client_id, ws = _dead.pop()
+            # Only drop it if the client hasn't reconnected under the same id
+            if connections.get(client_id) is ws:
+                del connections[client_id]
 
 if __name__ == "__main__":
     import uvicorn
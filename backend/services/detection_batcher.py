@@ -0,0 +1,74 @@
+"""
+Coalesces concurrent /detect-bottle requests into batched vision calls
+
+Frames that arrive within a short window are sent to GPT-4 Vision in one
+multi-image request, and each caller gets its own result back.
+"""
+
+import asyncio
+from typing import List, Tuple
+
+from backend.services.vision_detector import detect_bottles_batch
+
+
+class DetectionBatcher:
+    """Queue + debounce batcher in front of detect_bottles_batch"""
+    
+    def __init__(self, max_batch: int = 8, window: float = 0.05):
+        self.max_batch = max_batch
+        self.window = window  # seconds to wait for more frames
+        self._queue = None
+        self._task = None
+        self._flushes = set()  # strong refs so in-flight flushes aren't collected
+    
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def detect(self, image: str, mode: str = "full") -> dict:
+        """Queue a frame and wait for its detection result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, mode, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            
+            # Debounce: collect frames arriving within the window
+            deadline = asyncio.get_running_loop().time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            for mode in {mode for _, mode, _ in batch}:
+                flush = asyncio.create_task(self._flush([item for item in batch if item[1] == mode], mode))
+                self._flushes.add(flush)
+                flush.add_done_callback(self._flushes.discard)
+    
+    async def _flush(self, items: List[Tuple[str, str, asyncio.Future]], mode: str):
+        try:
+            results = await detect_bottles_batch([image for image, _, _ in items], mode)
+            for (_, _, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
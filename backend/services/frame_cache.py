@@ -0,0 +1,140 @@
+"""
+Caches for webcam bottle detections
+
+- DetectionMemo: exact repeats of a frame (client retries) are answered
+  from a fingerprint-keyed LRU, and concurrent repeats share one detection.
+- FrameCache: consecutive frames of a mostly static scene are nearly
+  identical, so a detection for one is reused for any later frame whose
+  64-bit perceptual hash is within a small Hamming distance.
+
+Failed and zero-confidence detections are never cached, so a transient
+vision error isn't replayed for a static scene.
+"""
+
+import asyncio
+import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from io import BytesIO
+import numpy as np
+import cv2
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import imagehash
+    from PIL import Image
+    IMAGEHASH_AVAILABLE = True
+except ImportError:
+    IMAGEHASH_AVAILABLE = False
+
+
+def fingerprint(image_base64: str) -> bytes:
+    """128-bit fingerprint of the exact base64 frame"""
+    data = image_base64.encode()
+    if BLAKE3_AVAILABLE:
+        return blake3.blake3(data).digest()[:16]
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def perceptual_hash(image_base64: str):
+    """64-bit perceptual hash of a base64 image, or None if it can't be decoded"""
+    try:
+        data = base64.b64decode(image_base64)
+    except ValueError:
+        return None
+
+    if IMAGEHASH_AVAILABLE:
+        try:
+            return int(str(imagehash.phash(Image.open(BytesIO(data)))), 16)
+        except Exception:
+            return None
+
+    # dHash: compare neighbouring pixels of a 9x8 grayscale thumbnail
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def is_cacheable(result: dict) -> bool:
+    """False for detections that errored or came back with zero confidence"""
+    return "error" not in result and result.get("confidence", 0) > 0
+
+
+class FrameCache:
+    """Ring buffer of (hash, mode, result, expiry) for recently detected frames"""
+
+    def __init__(self, max_entries: int = 128, max_distance: int = 4, ttl: float = 5.0):
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, frame_hash: int, mode: str):
+        """Cached result for a near-identical frame, or None"""
+        if frame_hash is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            # Entries are appended in time order, so expired ones are at the left
+            while self._entries and self._entries[0][3] <= now:
+                self._entries.popleft()
+            # Newest first - the previous frame is the likeliest match
+            for cached_hash, cached_mode, result, _ in reversed(self._entries):
+                if cached_mode == mode and (cached_hash ^ frame_hash).bit_count() <= self.max_distance:
+                    return result
+        return None
+
+    def put(self, frame_hash: int, mode: str, result: dict):
+        if frame_hash is None or not is_cacheable(result):
+            return
+        with self._lock:
+            self._entries.append((frame_hash, mode, result, time.monotonic() + self.ttl))
+
+
+class DetectionMemo:
+    """LRU of detections keyed by (fingerprint, mode), with in-flight sharing"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._pending = {}
+
+    async def get_or_detect(self, key: tuple, detect):
+        """Cached result for key, or await detect() once for all concurrent callers
+
+        detect() runs as its own task, so a caller that is cancelled (e.g. the
+        client disconnected) stops waiting without cancelling the others.
+        """
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(detect())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple, task: asyncio.Task):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        # exception() also marks it retrieved when nobody was left waiting
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if not is_cacheable(result):
+            return
+        self._results[key] = result
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
@@ -4,13 +4,54 @@ Uses GPT-4 Vision to accurately detect bottle and its parts
 """
 
 import os
+import json
 import base64
 from io import BytesIO
-from openai import OpenAI
+from typing import List
+from openai import AsyncOpenAI
+from backend.utils.env import load_env
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+load_env()
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def detect_bottle_with_vision(image_base64: str):
+
+# JSON schemas for structured outputs - the model returns raw JSON that
+# matches these exactly, so there are no markdown fences to strip
+def _object_schema(properties: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+_POINT_SCHEMA = _object_schema({"x": {"type": "integer"}, "y": {"type": "integer"}})
+_BBOX_SCHEMA = _object_schema({
+    "x": {"type": "integer"},
+    "y": {"type": "integer"},
+    "width": {"type": "integer"},
+    "height": {"type": "integer"}
+})
+FAST_DETECTION_SCHEMA = _object_schema({
+    "detected": {"type": "boolean"},
+    "bbox": _BBOX_SCHEMA,
+    "confidence": {"type": "number"}
+})
+FULL_DETECTION_SCHEMA = _object_schema({
+    "detected": {"type": "boolean"},
+    "bbox": _BBOX_SCHEMA,
+    "parts": _object_schema({"cap": _POINT_SCHEMA, "middle": _POINT_SCHEMA, "bottom": _POINT_SCHEMA}),
+    "confidence": {"type": "number"}
+})
+
+
+def _response_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True}
+    }
+
+async def detect_bottle_with_vision(image_base64: str):
     """
     Use GPT-4 Vision to detect bottle and return bounding box coordinates
     
@@ -31,7 +72,7 @@ def detect_bottle_with_vision(image_base64: str):
     """
     
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o",  # GPT-4 with vision
             messages=[
                 {
@@ -60,7 +101,7 @@ def detect_bottle_with_vision(image_base64: str):
                     - parts.cap is the center of the bottle cap/top
                     - parts.middle is the center of the bottle body
                     - parts.bottom is the center of the bottle base
-                    - Return ONLY valid JSON, no markdown, no explanation
+                    - Return ONLY valid JSON, no explanation
                     - IGNORE people, hands, faces - ONLY bottles
                     """
                 },
@@ -82,21 +123,12 @@ def detect_bottle_with_vision(image_base64: str):
                 }
             ],
             max_tokens=500,
-            temperature=0.1  # Low temperature for consistent results
+            temperature=0.1,  # Low temperature for consistent results
+            response_format=_response_format("BottleDetection", FULL_DETECTION_SCHEMA)
         )
         
         # Parse the response
-        import json
-        result_text = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if result_text.startswith("```"):
-            result_text = result_text.split("```")[1]
-            if result_text.startswith("json"):
-                result_text = result_text[4:]
-        
-        result = json.loads(result_text)
-        return result
+        return json.loads(response.choices[0].message.content)
         
     except Exception as e:
         print(f"Vision detection error: {e}")
@@ -112,14 +144,14 @@ def detect_bottle_with_vision(image_base64: str):
         }
 
 
-def detect_bottle_fast(image_base64: str):
+async def detect_bottle_fast(image_base64: str):
     """
     Faster version - just detects bottle bounding box, no parts
     Use this for real-time tracking
     """
     
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -143,18 +175,98 @@ def detect_bottle_fast(image_base64: str):
                 }
             ],
             max_tokens=200,
-            temperature=0
+            temperature=0,
+            response_format=_response_format("BottleDetectionFast", FAST_DETECTION_SCHEMA)
         )
         
-        import json
-        result_text = response.choices[0].message.content.strip()
-        if result_text.startswith("```"):
-            result_text = result_text.split("```")[1]
-            if result_text.startswith("json"):
-                result_text = result_text[4:]
-        
-        return json.loads(result_text)
+        return json.loads(response.choices[0].message.content)
         
     except Exception as e:
         print(f"Fast detection error: {e}")
         return {"detected": False, "bbox": {"x": 0, "y": 0, "width": 0, "height": 0}, "confidence": 0.0}
+
+
+def _empty_detection(mode: str = "full") -> dict:
+    """Detection result for a frame with no bottle"""
+    result = {"detected": False, "bbox": {"x": 0, "y": 0, "width": 0, "height": 0}, "confidence": 0.0}
+    if mode != "fast":
+        result["parts"] = {
+            "cap": {"x": 0, "y": 0},
+            "middle": {"x": 0, "y": 0},
+            "bottom": {"x": 0, "y": 0}
+        }
+    return result
+
+
+async def detect_bottles_batch(images: List[str], mode: str = "full") -> List[dict]:
+    """
+    Detect bottles in several frames with a single GPT-4 Vision request
+    
+    Args:
+        images: Base64 encoded JPEG images
+        mode: "full" (with parts) or "fast" (just bbox)
+        
+    Returns:
+        One detection dict per image, in the same order
+    """
+    if not images:
+        return []
+    if len(images) == 1:
+        detect = detect_bottle_fast if mode == "fast" else detect_bottle_with_vision
+        return [await detect(images[0])]
+    
+    if mode == "fast":
+        item_schema = '{"detected": true/false, "bbox": {"x": int, "y": int, "width": int, "height": int}, "confidence": float}'
+    else:
+        item_schema = """{"detected": true/false, "bbox": {"x": int, "y": int, "width": int, "height": int},
+                     "parts": {"cap": {"x": int, "y": int}, "middle": {"x": int, "y": int}, "bottom": {"x": int, "y": int}},
+                     "confidence": float}"""
+    
+    content = [{
+        "type": "text",
+        "text": f"Find the bottle in each of these {len(images)} images, in order."
+    }]
+    for image_base64 in images:
+        content.append({
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{image_base64}",
+                "detail": "low"
+            }
+        })
+    
+    try:
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"""Detect the bottle in each image. Return ONLY JSON with a
+                    "detections" array holding one object per image, in the order the images were given:
+                    {{"detections": [{item_schema}, ...]}}
+                    Coordinates are in pixels from the top-left of each image.
+                    If an image has no bottle, set detected=false and confidence=0.
+                    No markdown, just JSON."""
+                },
+                {"role": "user", "content": content}
+            ],
+            max_tokens=(200 if mode == "fast" else 500) * len(images),
+            temperature=0,
+            response_format=_response_format("BottleDetectionBatch", _object_schema({
+                "detections": {
+                    "type": "array",
+                    "items": FAST_DETECTION_SCHEMA if mode == "fast" else FULL_DETECTION_SCHEMA
+                }
+            }))
+        )
+        
+        results = json.loads(response.choices[0].message.content)["detections"]
+        
+        # Pad or trim so every caller gets exactly one result
+        results = [r if isinstance(r, dict) else _empty_detection(mode) for r in results[:len(images)]]
+        results += [_empty_detection(mode) for _ in range(len(images) - len(results))]
+        return results
+        
+    except Exception as e:
+        print(f"Batch detection error: {e}")
+        return [_empty_detection(mode) for _ in images]
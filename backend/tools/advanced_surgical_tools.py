@@ -5,10 +5,65 @@ These tools enable sophisticated geometric and safety analysis
 for surgical guidance using 3D mesh data and annotations.
 """
 
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 import numpy as np
 from typing import List, Dict, Tuple
 import math
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _approach_math_py(ex, ey, ez, tx, ty, tz):
+    """(ux, uy, uz, distance, degrees from vertical, azimuth degrees) from entry to target."""
+    dx = tx - ex
+    dy = ty - ey
+    dz = tz - ez
+    distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+    if distance < 0.001:
+        return 0.0, -1.0, 0.0, distance, 0.0, 0.0
+    ux = dx / distance
+    uy = dy / distance
+    uz = dz / distance
+    # Angle from straight down (0, -1, 0)
+    cos_vertical = -uy
+    if cos_vertical > 1.0:
+        cos_vertical = 1.0
+    elif cos_vertical < -1.0:
+        cos_vertical = -1.0
+    return (
+        ux, uy, uz, distance,
+        math.degrees(math.acos(cos_vertical)),
+        math.degrees(math.atan2(dx, dz))
+    )
+
+
+if NUMBA_AVAILABLE:
+    _approach_math = njit(
+        'UniTuple(float64, 6)(float64, float64, float64, float64, float64, float64)',
+        cache=True,
+        error_model='numpy'
+    )(_approach_math_py)
+else:
+    _approach_math = _approach_math_py
+
+
+def _distances_to(entry: List[float], points: np.ndarray) -> np.ndarray:
+    """Distance (mm) from entry to each row of an (N, 3) points array."""
+    return np.linalg.norm(points - np.asarray(entry, dtype=np.float64), axis=1) * 10
+
+
+# analyze_mesh_geometry results keyed by a hash of the sampled vertices
+_MESH_CACHE_SIZE = 32
+_mesh_cache = OrderedDict()
+_mesh_cache_lock = threading.Lock()
+
 
 def analyze_mesh_geometry(vertices: List[List[float]], max_samples: int = 100) -> Dict:
     """Analyze 3D mesh geometry to identify key features and zones.
@@ -24,7 +79,7 @@ def analyze_mesh_geometry(vertices: List[List[float]], max_samples: int = 100) -
         - safe_zones: Middle 60% 
         - dimensions: Object dimensions
     """
-    if not vertices or len(vertices) == 0:
+    if vertices is None or len(vertices) == 0:
         return {
             "bounds": {"min": [0, 0, 0], "max": [0, 0, 0]},
             "high_risk_zones": [],
@@ -33,12 +88,29 @@ def analyze_mesh_geometry(vertices: List[List[float]], max_samples: int = 100) -
             "analyzed_vertices": 0
         }
     
-    # Sample vertices if too many
+    # Sample vertices if too many. Random indices rather than a fixed stride,
+    # since meshes are often stored face by face and a stride over-samples
+    # whichever part comes first; the fixed seed keeps results repeatable.
+    # Only the sampled rows are converted, to float64 so bounds and centers
+    # come back exactly as sent.
     if len(vertices) > max_samples:
-        step = len(vertices) // max_samples
-        vertices = vertices[::step]
-    
-    vertices_array = np.array(vertices)
+        indices = np.sort(np.random.default_rng(0).choice(len(vertices), max_samples, replace=False))
+        if isinstance(vertices, np.ndarray):
+            vertices_array = np.asarray(vertices[indices], dtype=np.float64)
+        else:
+            vertices_array = np.asarray([vertices[i] for i in indices.tolist()], dtype=np.float64)
+    else:
+        vertices_array = np.asarray(vertices, dtype=np.float64)
+    
+    # The result depends only on the sampled rows, so hash those (a few KB)
+    # rather than the whole mesh
+    cache_key = (vertices_array.shape, hashlib.blake2b(vertices_array.tobytes(), digest_size=16).digest())
+    with _mesh_cache_lock:
+        cached = _mesh_cache.get(cache_key)
+        if cached is not None:
+            _mesh_cache.move_to_end(cache_key)
+            # Deep copy - callers add keys and hand out the nested lists
+            return copy.deepcopy(cached)
     
     # Calculate bounds
     min_coords = vertices_array.min(axis=0)
@@ -52,15 +124,17 @@ def analyze_mesh_geometry(vertices: List[List[float]], max_samples: int = 100) -
     
     # High risk: top 20% (like vessel-dense cap area)
     high_risk_threshold = y_max - (y_range * 0.2)
-    high_risk_vertices = vertices_array[y_coords > high_risk_threshold]
+    high_mask = y_coords > high_risk_threshold
     
     # Safe zone: middle 60%
     safe_top_threshold = y_max - (y_range * 0.3)
     safe_bottom_threshold = y_min + (y_range * 0.1)
     safe_mask = (y_coords < safe_top_threshold) & (y_coords > safe_bottom_threshold)
-    safe_vertices = vertices_array[safe_mask]
     
-    return {
+    high_risk_count = int(np.count_nonzero(high_mask))
+    safe_count = int(np.count_nonzero(safe_mask))
+    
+    result = {
         "bounds": {
             "min": min_coords.tolist(),
             "max": max_coords.tolist()
@@ -68,22 +142,30 @@ def analyze_mesh_geometry(vertices: List[List[float]], max_samples: int = 100) -
         "high_risk_zones": [
             {
                 "region": "top_20_percent",
-                "center": high_risk_vertices.mean(axis=0).tolist() if len(high_risk_vertices) > 0 else max_coords.tolist(),
-                "count": len(high_risk_vertices),
+                "center": vertices_array[high_mask].mean(axis=0).tolist() if high_risk_count else max_coords.tolist(),
+                "count": high_risk_count,
                 "description": "Vessel-dense area (simulated)"
             }
         ],
         "safe_zones": [
             {
                 "region": "middle_60_percent", 
-                "center": safe_vertices.mean(axis=0).tolist() if len(safe_vertices) > 0 else [(min_coords[0] + max_coords[0])/2, (min_coords[1] + max_coords[1])/2, (min_coords[2] + max_coords[2])/2],
-                "count": len(safe_vertices),
+                "center": vertices_array[safe_mask].mean(axis=0).tolist() if safe_count else ((min_coords + max_coords) / 2).tolist(),
+                "count": safe_count,
                 "description": "Lower risk tissue area"
             }
         ],
         "dimensions": dimensions.tolist(),
-        "analyzed_vertices": len(vertices)
+        "analyzed_vertices": len(vertices_array),
+        # Array copy of bounds for score_entry_point_safety (not JSON-serializable)
+        "_bounds_np": (min_coords, max_coords)
     }
+    
+    with _mesh_cache_lock:
+        _mesh_cache[cache_key] = result
+        if len(_mesh_cache) > _MESH_CACHE_SIZE:
+            _mesh_cache.popitem(last=False)
+    return copy.deepcopy(result)
 
 
 def score_entry_point_safety(
@@ -101,7 +183,7 @@ def score_entry_point_safety(
     Returns:
         Safety score (0-100) with breakdown
     """
-    from backend.tools.measurement_tools import calculate_distance_3d
+    from backend.tools.measurement_tools import _dist_mm_xyz
     
     scores = {
         "overall": 0,
@@ -110,16 +192,17 @@ def score_entry_point_safety(
     
     # Score 1: Distance from high-risk zones (40% weight)
     if mesh_analysis.get("high_risk_zones"):
-        min_risk_distance = float('inf')
-        for risk_zone in mesh_analysis["high_risk_zones"]:
-            dist = calculate_distance_3d(entry_point, risk_zone["center"])["distance_mm"]
-            min_risk_distance = min(min_risk_distance, dist)
+        risk_zones = mesh_analysis["high_risk_zones"]
+        risk_distances = _distances_to(entry_point, np.asarray([zone["center"] for zone in risk_zones], dtype=np.float64))
+        nearest = int(risk_distances.argmin())
+        min_risk_distance = round(float(risk_distances[nearest]), 1)
         
         # Normalize: >50mm = 100 points, <10mm = 0 points
         risk_score = min(100, max(0, (min_risk_distance - 10) / 40 * 100))
         scores["breakdown"]["risk_distance"] = {
             "score": round(risk_score, 1),
-            "distance_mm": round(min_risk_distance, 1),
+            "distance_mm": min_risk_distance,
+            "nearest_zone": risk_zones[nearest].get("region"),
             "weight": 0.4
         }
     else:
@@ -128,7 +211,11 @@ def score_entry_point_safety(
     # Score 2: Proximity to safe zone (30% weight)
     if mesh_analysis.get("safe_zones"):
         safe_zone = mesh_analysis["safe_zones"][0]
-        safe_dist = calculate_distance_3d(entry_point, safe_zone["center"])["distance_mm"]
+        safe_center = safe_zone["center"]
+        safe_dist = round(_dist_mm_xyz(
+            entry_point[0], entry_point[1], entry_point[2],
+            safe_center[0], safe_center[1], safe_center[2]
+        ), 1)
         
         # Closer to safe zone = better (inverse scoring)
         safe_score = min(100, max(0, 100 - (safe_dist / 50 * 100)))
@@ -142,11 +229,15 @@ def score_entry_point_safety(
     
     # Score 3: Structural considerations (20% weight)
     # Check if point is within reasonable bounds
-    bounds = mesh_analysis.get("bounds", {"min": [-1, -1, -1], "max": [1, 1, 1]})
-    in_bounds = all(
-        bounds["min"][i] <= entry_point[i] <= bounds["max"][i]
-        for i in range(3)
-    )
+    bounds_np = mesh_analysis.get("_bounds_np")
+    if bounds_np is None:
+        bounds = mesh_analysis.get("bounds", {"min": [-1, -1, -1], "max": [1, 1, 1]})
+        bounds_np = (
+            np.asarray(bounds["min"][:3], dtype=np.float64),
+            np.asarray(bounds["max"][:3], dtype=np.float64)
+        )
+    point = np.asarray(entry_point[:3], dtype=np.float64)
+    in_bounds = bool(((bounds_np[0] <= point) & (point <= bounds_np[1])).all())
     structural_score = 100 if in_bounds else 0
     scores["breakdown"]["structural_integrity"] = {
         "score": structural_score,
@@ -157,11 +248,13 @@ def score_entry_point_safety(
     # Score 4: Avoid collision with annotations (10% weight)
     annotation_score = 100
     if annotations:
-        min_annotation_dist = float('inf')
-        for ann in annotations:
-            if "position" in ann:
-                dist = calculate_distance_3d(entry_point, ann["position"])["distance_mm"]
-                min_annotation_dist = min(min_annotation_dist, dist)
+        positions = [ann["position"] for ann in annotations if "position" in ann]
+        if positions:
+            min_annotation_dist = round(float(
+                _distances_to(entry_point, np.asarray(positions, dtype=np.float64)).min()
+            ), 1)
+        else:
+            min_annotation_dist = float('inf')
         
         # Penalize if too close to existing annotations
         if min_annotation_dist < 15:  # Too close
@@ -232,15 +325,15 @@ def find_candidate_entry_points(
     
     angles = np.linspace(0, 2 * np.pi, num_candidates - 1, endpoint=False)
     
-    for angle in angles:
-        x = center[0] + radius * np.cos(angle)
-        z = center[2] + radius * np.sin(angle)
-        
-        candidates.append({
-            "position": [float(x), float(y_middle), float(z)],
-            "approach": f"lateral_{int(np.degrees(angle))}deg",
-            "description": f"Lateral approach at {int(np.degrees(angle))}°"
-        })
+    xs = center[0] + radius * np.cos(angles)
+    zs = center[2] + radius * np.sin(angles)
+    degrees = np.degrees(angles).astype(int)
+    
+    candidates.extend({
+        "position": [float(x), float(y_middle), float(z)],
+        "approach": f"lateral_{d}deg",
+        "description": f"Lateral approach at {d}°"
+    } for x, z, d in zip(xs.tolist(), zs.tolist(), degrees.tolist()))
     
     return candidates[:num_candidates]
 
@@ -258,12 +351,10 @@ def calculate_approach_vector(
     Returns:
         Approach vector information with angles and direction
     """
-    entry = np.array(entry_point)
-    target = np.array(target_point)
-    
-    # Direction vector
-    direction = target - entry
-    distance = np.linalg.norm(direction)
+    ux, uy, uz, distance, angle_from_vertical_deg, azimuth_deg = _approach_math(
+        entry_point[0], entry_point[1], entry_point[2],
+        target_point[0], target_point[1], target_point[2]
+    )
     
     if distance < 0.001:  # Too close
         return {
@@ -273,19 +364,8 @@ def calculate_approach_vector(
             "azimuth_angle": 0
         }
     
-    direction_normalized = direction / distance
-    
-    # Angle from vertical (y-axis)
-    vertical = np.array([0, -1, 0])  # Downward
-    angle_from_vertical = np.arccos(np.clip(np.dot(direction_normalized, vertical), -1.0, 1.0))
-    angle_from_vertical_deg = np.degrees(angle_from_vertical)
-    
-    # Azimuth angle (rotation around y-axis)
-    azimuth = np.arctan2(direction[0], direction[2])
-    azimuth_deg = np.degrees(azimuth)
-    
     return {
-        "vector": direction_normalized.tolist(),
+        "vector": [ux, uy, uz],
         "distance_mm": round(distance * 10, 1),  # Convert to mm
         "angle_from_vertical": round(angle_from_vertical_deg, 1),
         "azimuth_angle": round(azimuth_deg, 1),
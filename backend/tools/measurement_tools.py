@@ -1,6 +1,72 @@
 import math
 import numpy as np
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # Explicit signatures compile at import (cached on disk), so the first
+    # tool call doesn't pay the JIT cost
+    @njit('UniTuple(float64, 2)(float64[::1], float64[::1], float64[::1])', cache=True, error_model='numpy')
+    def _angle_kernel(point1, vertex, point2):
+        """(degrees, radians) of the angle at vertex; NaN for zero-length arms."""
+        dot = 0.0
+        n1 = 0.0
+        n2 = 0.0
+        for i in range(3):
+            a = point1[i] - vertex[i]
+            b = point2[i] - vertex[i]
+            dot += a * b
+            n1 += a * a
+            n2 += b * b
+        cos_angle = dot / (math.sqrt(n1) * math.sqrt(n2))
+        # Clip without min/max so NaN passes through like np.clip
+        if cos_angle > 1.0:
+            cos_angle = 1.0
+        elif cos_angle < -1.0:
+            cos_angle = -1.0
+        angle_rad = math.acos(cos_angle)
+        return math.degrees(angle_rad), angle_rad
+
+    @njit('float64(float64, float64, float64, float64, float64, float64)', cache=True)
+    def _dist_mm_xyz(p1x, p1y, p1z, p2x, p2y, p2z):
+        """Distance (mm) between two points, without building a result dict."""
+        dx = p2x - p1x
+        dy = p2y - p1y
+        dz = p2z - p1z
+        return math.sqrt(dx * dx + dy * dy + dz * dz) * 10
+
+    @njit('float64[::1](float64[::1], float64[:, ::1])', cache=True, fastmath=True)
+    def _zone_distances_mm(point, centers):
+        """Distance (mm) from point to each zone center."""
+        out = np.empty(centers.shape[0])
+        for i in range(centers.shape[0]):
+            dx = centers[i, 0] - point[0]
+            dy = centers[i, 1] - point[1]
+            dz = centers[i, 2] - point[2]
+            out[i] = math.sqrt(dx * dx + dy * dy + dz * dz) * 10
+        return out
+else:
+    def _dist_mm_xyz(p1x, p1y, p1z, p2x, p2y, p2z):
+        dx = p2x - p1x
+        dy = p2y - p1y
+        dz = p2z - p1z
+        return math.sqrt(dx * dx + dy * dy + dz * dz) * 10
+
+    def _angle_kernel(point1, vertex, point2):
+        v1 = point1 - vertex
+        v2 = point2 - vertex
+        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+        angle_rad = float(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+        return math.degrees(angle_rad), angle_rad
+
+    def _zone_distances_mm(point, centers):
+        return np.linalg.norm(centers - point, axis=1) * 10
+
 def calculate_distance_3d(point1: list[float], point2: list[float]) -> dict:
     """Calculate 3D Euclidean distance between two points.
     
@@ -11,12 +77,8 @@ def calculate_distance_3d(point1: list[float], point2: list[float]) -> dict:
     Returns:
         Dictionary with distance in mm and formatted string
     """
-    dx = point2[0] - point1[0]
-    dy = point2[1] - point1[1]
-    dz = point2[2] - point1[2]
-    
-    distance = math.sqrt(dx**2 + dy**2 + dz**2)
-    distance_mm = distance * 10  # Convert to millimeters (assuming units)
+    # Convert to millimeters (assuming units)
+    distance_mm = _dist_mm_xyz(point1[0], point1[1], point1[2], point2[0], point2[1], point2[2])
     
     return {
         "distance_mm": round(distance_mm, 1),
@@ -35,14 +97,9 @@ def calculate_angle(point1: list[float], vertex: list[float], point2: list[float
     Returns:
         Dictionary with angle in degrees
     """
-    # Create vectors
-    v1 = np.array(point1) - np.array(vertex)
-    v2 = np.array(point2) - np.array(vertex)
-    
-    # Calculate angle
-    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-    angle_rad = np.arccos(np.clip(cos_angle, -1.0, 1.0))
-    angle_deg = np.degrees(angle_rad)
+    # One (3, 3) buffer; its rows are contiguous views for the kernel
+    points = np.asarray([point1[:3], vertex[:3], point2[:3]], dtype=np.float64)
+    angle_deg, angle_rad = _angle_kernel(points[0], points[1], points[2])
     
     return {
         "angle_degrees": round(angle_deg, 1),
@@ -60,17 +117,29 @@ def assess_risk_zone(annotation_position: list[float], critical_zones: list[dict
     Returns:
         Risk assessment with warnings
     """
-    warnings = []
-    min_distance = float('inf')
-    nearest_structure = None
+    if not critical_zones:
+        return {
+            "risk_level": "low",
+            "warnings": [],
+            "nearest_structure": None,
+            "distance_to_nearest": float('inf')
+        }
+    
+    # Round like the reported value (Python's round, not np.round, which can
+    # land on the other side of a .x5 boundary) before comparing to radii
+    distances = np.array([round(d, 1) for d in _zone_distances_mm(
+        np.asarray(annotation_position[:3], dtype=np.float64),
+        np.asarray([zone['position'][:3] for zone in critical_zones], dtype=np.float64).reshape(-1, 3)
+    ).tolist()])
+    radii = np.asarray([zone['radius'] for zone in critical_zones], dtype=np.float64)
     
-    for zone in critical_zones:
-        distance = calculate_distance_3d(annotation_position, zone['position'])['distance_mm']
-        if distance < zone['radius']:
-            warnings.append(f"⚠️ Within {distance:.1f}mm of {zone['name']}")
-        if distance < min_distance:
-            min_distance = distance
-            nearest_structure = zone['name']
+    warnings = [
+        f"⚠️ Within {distances[i]:.1f}mm of {critical_zones[i]['name']}"
+        for i in np.flatnonzero(distances < radii)
+    ]
+    nearest = int(distances.argmin())
+    min_distance = float(distances[nearest])
+    nearest_structure = critical_zones[nearest]['name']
     
     risk_level = "high" if warnings else ("medium" if min_distance < 20 else "low")
     
@@ -1,6 +1,83 @@
 import cv2
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from backend.utils.env import temp_dir
+
+logger = logging.getLogger(__name__)
+
+JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85]
+# Keyframe sampling needs a video this many frames long per sample, so clips
+# too short to have enough keyframes go straight to the OpenCV path
+KEYFRAME_MIN_INTERVAL = 30
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+def _read_keyframes(video_path: str, max_frames: int) -> list:
+    """max_frames keyframes spread across the whole video, as BGR arrays.
+    
+    Seeks to evenly spaced timestamps and decodes the next keyframe not yet
+    taken, so only those keyframes are decoded. Returns an empty list if
+    PyAV is unavailable, the video is too short, or it can't be decoded.
+    """
+    if not AV_AVAILABLE:
+        return []
+    
+    keyframes = []
+    try:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            if not stream.duration:
+                return []
+            total_frames = stream.frames or int(stream.duration * stream.time_base * (stream.average_rate or 0))
+            if total_frames < max_frames * KEYFRAME_MIN_INTERVAL:
+                return []
+            
+            stream.codec_context.skip_frame = "NONKEY"
+            start = stream.start_time or 0
+            taken = set()
+            for k in range(max_frames):
+                # Lands on the keyframe at or before the target timestamp
+                container.seek(start + stream.duration * k // max_frames, stream=stream)
+                for frame in container.decode(stream):
+                    if frame.pts not in taken:
+                        taken.add(frame.pts)
+                        keyframes.append(frame.to_ndarray(format="bgr24"))
+                        break
+    except Exception as e:
+        logger.warning("PyAV keyframe decode failed, using OpenCV: %s", e)
+        return []
+    return keyframes
+
+def _read_sampled_frames(video_path: str, max_frames: int):
+    """Yield (index, BGR frame) for max_frames evenly spaced frames."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_interval = max(1, total_frames // max_frames)
+    
+    # Decode sequentially instead of seeking to each frame - a seek makes
+    # the decoder restart from the previous keyframe
+    try:
+        i = 0
+        kept = 0
+        while kept < max_frames:
+            if i % frame_interval == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield i, frame
+                kept += 1
+            elif not cap.grab():  # Advance without converting the frame
+                break
+            i += 1
+    finally:
+        cap.release()
+
 def extract_frames(video_path: str, max_frames: int = 10) -> dict:
     """Extract frames from video for 3D reconstruction.
     
@@ -11,24 +88,36 @@ def extract_frames(video_path: str, max_frames: int = 10) -> dict:
     Returns:
         Dictionary with frame count and paths
     """
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    frame_interval = max(1, total_frames // max_frames)
+    # Keyframes only need the keyframes decoded, which is far cheaper on long
+    # videos. Short clips don't have enough of them - then decode the stream
+    # and sample evenly instead.
+    keyframes = _read_keyframes(video_path, max_frames)
+    if len(keyframes) >= max_frames:
+        sampled = enumerate(keyframes)
+    else:
+        sampled = _read_sampled_frames(video_path, max_frames)
     
+    # JPEG encoding runs on worker threads, overlapping the next decode.
+    # Frames go to the same staging directory as the uploaded videos.
+    output_dir = temp_dir()
     frames = []
-    for i in range(0, total_frames, frame_interval):
-        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-        ret, frame = cap.read()
-        if ret:
-            frame_path = f"temp/frame_{i}.jpg"
-            cv2.imwrite(frame_path, frame)
-            frames.append(frame_path)
+    writes = []
+    with ThreadPoolExecutor(max_workers=2) as writer:
+        for i, frame in sampled:
+            frame_path = str(output_dir / f"frame_{i}.jpg")
+            writes.append((frame_path, writer.submit(cv2.imwrite, frame_path, frame, JPEG_PARAMS)))
+        
+        # imwrite reports failure by returning False, not raising
+        for frame_path, write in writes:
+            if write.result():
+                frames.append(frame_path)
+            else:
+                logger.warning("Could not write frame %s", frame_path)
     
-    cap.release()
     return {
         "frame_count": len(frames),
         "frame_paths": frames,
-        "status": "extracted"
+        "status": "extracted" if frames else "failed"
     }
 
 def report_progress(step: str, percentage: int) -> dict:
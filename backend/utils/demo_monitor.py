@@ -1,5 +1,6 @@
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
 class DemoMonitor:
@@ -19,39 +20,51 @@ class DemoMonitor:
         )
         self.logger = logging.getLogger('DemoMonitor')
         
-        self.events = []
+        # (checkpoint, success, monotonic seconds, details); dicts are only
+        # built for the report
+        self.events: list[tuple] = []
         self.start_time = None
+        self._start_monotonic = time.monotonic()
+        self._start_wall = datetime.now()
     
     def start_demo(self):
         """Mark demo start."""
         self.start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
+        self._start_wall = self.start_time
         self.logger.info("=== DEMO STARTED ===")
     
     def log_checkpoint(self, checkpoint: str, success: bool, details: str = ""):
         """Log checkpoint completion."""
-        event = {
-            "checkpoint": checkpoint,
-            "success": success,
-            "time": datetime.now(),
-            "details": details
-        }
-        self.events.append(event)
+        self.events.append((checkpoint, success, time.monotonic(), details))
         
         status = "✓" if success else "✗"
-        self.logger.info(f"{status} {checkpoint}: {details}")
+        self.logger.info("%s %s: %s", status, checkpoint, details)
     
     def end_demo(self):
         """Mark demo end and generate report."""
-        duration = (datetime.now() - self.start_time).total_seconds()
-        success_rate = sum(1 for e in self.events if e['success']) / len(self.events) if self.events else 0
+        duration = time.monotonic() - self._start_monotonic
+        success_rate = sum(1 for e in self.events if e[1]) / len(self.events) if self.events else 0
         
         self.logger.info("=== DEMO COMPLETE ===")
-        self.logger.info(f"Duration: {duration:.1f}s")
-        self.logger.info(f"Success Rate: {success_rate:.1%}")
-        self.logger.info(f"Log file: {self.log_file}")
+        self.logger.info("Duration: %.1fs", duration)
+        self.logger.info("Success Rate: %.1f%%", success_rate * 100)
+        self.logger.info("Log file: %s", self.log_file)
         
         return {
             "duration": duration,
             "success_rate": success_rate,
-            "events": self.events
+            "events": self.to_dict()
         }
+    
+    def to_dict(self) -> list[dict]:
+        """Events as dicts with wall-clock times."""
+        return [
+            {
+                "checkpoint": checkpoint,
+                "success": success,
+                "time": self._start_wall + timedelta(seconds=timestamp - self._start_monotonic),
+                "details": details
+            }
+            for checkpoint, success, timestamp, details in self.events
+        ]
@@ -0,0 +1,33 @@
+"""
+Load .env once per process
+
+Agent and service modules each call load_env() on import. Only the first
+call reads the .env file; it marks the environment so later calls (and
+child processes, which inherit the marker) skip the rescan.
+
+temp_dir() is the one place the FIXIT_TEMP_DIR staging directory is resolved.
+"""
+
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+_LOADED_MARKER = "_DOTENV_LOADED"
+
+
+def load_env():
+    """Load .env into os.environ unless it has already been loaded"""
+    if not os.environ.get(_LOADED_MARKER):
+        load_dotenv()
+        os.environ[_LOADED_MARKER] = "1"
+
+
+def temp_dir() -> Path:
+    """Staging directory for uploaded videos and extracted frames, created if missing
+    
+    FIXIT_TEMP_DIR overrides the default temp/ (e.g. a tmpfs mount like /dev/shm/fixit).
+    """
+    load_env()
+    path = Path(os.getenv("FIXIT_TEMP_DIR", "temp"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
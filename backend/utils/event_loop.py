@@ -0,0 +1,19 @@
+"""
+Entry point helper for the standalone async scripts
+
+run() drives a coroutine on uvloop when it's installed and falls back to
+the default asyncio loop otherwise (e.g. on Windows, where uvloop doesn't
+exist). Nothing is installed globally, so importing this never changes
+the event loop policy for pytest or uvicorn.
+"""
+
+import asyncio
+
+
+def run(main):
+    """Run a coroutine to completion, on uvloop where available"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    return uvloop.run(main)
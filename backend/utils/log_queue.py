@@ -0,0 +1,54 @@
+"""
+Non-blocking logging for the API server.
+
+Records are handed to a QueueHandler and written to stderr by a
+QueueListener thread, so logging from request handlers never blocks the
+asyncio event loop on terminal I/O.
+"""
+
+import contextvars
+import logging
+import logging.handlers
+import queue
+
+_listener = None
+
+# Tag for the current request/connection, e.g. the WebSocket client id.
+# Set it with log_context.set(...) and every record logged in that
+# context carries it as %(context)s.
+log_context = contextvars.ContextVar("log_context", default="-")
+
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        # Runs in the logging caller's context, before the record is queued
+        record.context = log_context.get()
+        return True
+
+
+def start_queue_logging(level: int = logging.INFO):
+    """Route root logging through a queue drained by a background thread."""
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(levelname)-9s %(name)s [%(context)s]: %(message)s'))
+    
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_queue_logging():
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
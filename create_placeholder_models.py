@@ -4,10 +4,16 @@ These are basic geometric shapes that can be used for testing.
 For a real demo, replace these with actual 3D scans using Polycam or downloaded models.
 """
 
+import os
 import struct
 import json
 import base64
 from pathlib import Path
+import numpy as np
+
+# GLB header + JSON chunk header, and BIN chunk header
+GLB_HEADER = struct.Struct('<4sIII4s')
+GLB_CHUNK_HEADER = struct.Struct('<I4s')
 
 def create_simple_glb(output_path, vertices, indices, name="Model"):
     """
@@ -15,12 +21,13 @@ def create_simple_glb(output_path, vertices, indices, name="Model"):
     GLB format: Binary glTF 2.0
     """
     
-    # Convert vertices to binary
-    vertex_data = b''.join(struct.pack('<fff', *v) for v in vertices)
+    # Convert vertices to binary (little-endian float32, one copy)
+    vertex_array = np.ascontiguousarray(vertices, dtype='<f4')
+    vertex_data = vertex_array.tobytes()
     vertex_buffer_length = len(vertex_data)
     
-    # Convert indices to binary
-    index_data = b''.join(struct.pack('<H', i) for i in indices)
+    # Convert indices to binary (little-endian uint16)
+    index_data = np.asarray(indices, dtype='<u2').tobytes()
     index_buffer_length = len(index_data)
     
     # Total buffer data
@@ -44,10 +51,10 @@ def create_simple_glb(output_path, vertices, indices, name="Model"):
             {
                 "bufferView": 0,
                 "componentType": 5126,  # FLOAT
-                "count": len(vertices),
+                "count": len(vertex_array),
                 "type": "VEC3",
-                "max": [max(v[i] for v in vertices) for i in range(3)],
-                "min": [min(v[i] for v in vertices) for i in range(3)]
+                "max": vertex_array.max(axis=0).tolist(),
+                "min": vertex_array.min(axis=0).tolist()
             },
             {
                 "bufferView": 1,
@@ -88,96 +95,56 @@ def create_simple_glb(output_path, vertices, indices, name="Model"):
     # Total file length
     total_length = 12 + 8 + json_chunk_length + 8 + buffer_chunk_length
     
-    # Write GLB file
-    with open(output_path, 'wb') as f:
-        # Header
-        f.write(b'glTF')  # Magic
-        f.write(struct.pack('<I', 2))  # Version
-        f.write(struct.pack('<I', total_length))  # Total length
-        
-        # JSON chunk
-        f.write(struct.pack('<I', json_chunk_length))  # Chunk length
-        f.write(b'JSON')  # Chunk type
-        f.write(json_data)
-        
-        # Binary chunk
-        f.write(struct.pack('<I', buffer_chunk_length))  # Chunk length
-        f.write(b'BIN\x00')  # Chunk type
-        f.write(buffer_data)
+    # Write GLB file in one go: header (magic, version, total length),
+    # JSON chunk, then binary chunk
+    Path(output_path).write_bytes(b''.join((
+        GLB_HEADER.pack(b'glTF', 2, total_length, json_chunk_length, b'JSON'),
+        json_data,
+        GLB_CHUNK_HEADER.pack(buffer_chunk_length, b'BIN\x00'),
+        buffer_data
+    )))
     
     print(f"✓ Created {output_path.name} ({total_length} bytes)")
 
+# Bottle rim: 8 points around a unit circle in the XZ plane
+UNIT_RING = np.array([
+    (1.0, 0.0), (0.7, 0.7), (0.0, 1.0), (-0.7, 0.7),
+    (-1.0, 0.0), (-0.7, -0.7), (0.0, -1.0), (0.7, -0.7)
+])
+
+# Shared by every bottle: vertex 0/9 are the bottom/top centers, 1-8/10-17 the rims
+BOTTLE_INDICES = (
+    # Bottom face
+    0,1,2, 0,2,3, 0,3,4, 0,4,5, 0,5,6, 0,6,7, 0,7,8, 0,8,1,
+    # Top face
+    9,11,10, 9,12,11, 9,13,12, 9,14,13, 9,15,14, 9,16,15, 9,17,16, 9,10,17,
+    # Sides
+    1,10,11, 1,11,2, 2,11,12, 2,12,3, 3,12,13, 3,13,4,
+    4,13,14, 4,14,5, 5,14,15, 5,15,6, 6,15,16, 6,16,7,
+    7,16,17, 7,17,8, 8,17,10, 8,10,1
+)
+
+def create_bottle(radius, height):
+    """Create a cylindrical bottle shape by scaling the unit ring"""
+    ring = UNIT_RING * radius
+    bottom = np.zeros((9, 3))
+    bottom[1:, 0] = ring[:, 0]
+    bottom[1:, 2] = ring[:, 1]
+    top = bottom.copy()
+    top[:, 1] = height
+    return np.vstack([bottom, top]).tolist(), BOTTLE_INDICES
+
 def create_bottle_small():
     """Create a small cylindrical bottle shape"""
-    vertices = [
-        # Bottom circle (y=0)
-        [0.0, 0.0, 0.0],
-        [0.2, 0.0, 0.0], [0.14, 0.0, 0.14], [0.0, 0.0, 0.2],
-        [-0.14, 0.0, 0.14], [-0.2, 0.0, 0.0], [-0.14, 0.0, -0.14], [0.0, 0.0, -0.2], [0.14, 0.0, -0.14],
-        # Top circle (y=0.5)
-        [0.0, 0.5, 0.0],
-        [0.2, 0.5, 0.0], [0.14, 0.5, 0.14], [0.0, 0.5, 0.2],
-        [-0.14, 0.5, 0.14], [-0.2, 0.5, 0.0], [-0.14, 0.5, -0.14], [0.0, 0.5, -0.2], [0.14, 0.5, -0.14],
-    ]
-    
-    indices = [
-        # Bottom face
-        0,1,2, 0,2,3, 0,3,4, 0,4,5, 0,5,6, 0,6,7, 0,7,8, 0,8,1,
-        # Top face
-        9,11,10, 9,12,11, 9,13,12, 9,14,13, 9,15,14, 9,16,15, 9,17,16, 9,10,17,
-        # Sides
-        1,10,11, 1,11,2, 2,11,12, 2,12,3, 3,12,13, 3,13,4,
-        4,13,14, 4,14,5, 5,14,15, 5,15,6, 6,15,16, 6,16,7,
-        7,16,17, 7,17,8, 8,17,10, 8,10,1
-    ]
-    
-    return vertices, indices
+    return create_bottle(0.2, 0.5)
 
 def create_bottle_medium():
     """Create a medium cylindrical bottle shape"""
-    vertices = [
-        # Bottom circle
-        [0.0, 0.0, 0.0],
-        [0.3, 0.0, 0.0], [0.21, 0.0, 0.21], [0.0, 0.0, 0.3],
-        [-0.21, 0.0, 0.21], [-0.3, 0.0, 0.0], [-0.21, 0.0, -0.21], [0.0, 0.0, -0.3], [0.21, 0.0, -0.21],
-        # Top circle (taller)
-        [0.0, 0.8, 0.0],
-        [0.3, 0.8, 0.0], [0.21, 0.8, 0.21], [0.0, 0.8, 0.3],
-        [-0.21, 0.8, 0.21], [-0.3, 0.8, 0.0], [-0.21, 0.8, -0.21], [0.0, 0.8, -0.3], [0.21, 0.8, -0.21],
-    ]
-    
-    indices = [
-        0,1,2, 0,2,3, 0,3,4, 0,4,5, 0,5,6, 0,6,7, 0,7,8, 0,8,1,
-        9,11,10, 9,12,11, 9,13,12, 9,14,13, 9,15,14, 9,16,15, 9,17,16, 9,10,17,
-        1,10,11, 1,11,2, 2,11,12, 2,12,3, 3,12,13, 3,13,4,
-        4,13,14, 4,14,5, 5,14,15, 5,15,6, 6,15,16, 6,16,7,
-        7,16,17, 7,17,8, 8,17,10, 8,10,1
-    ]
-    
-    return vertices, indices
+    return create_bottle(0.3, 0.8)
 
 def create_bottle_large():
     """Create a large cylindrical bottle shape"""
-    vertices = [
-        # Bottom circle
-        [0.0, 0.0, 0.0],
-        [0.4, 0.0, 0.0], [0.28, 0.0, 0.28], [0.0, 0.0, 0.4],
-        [-0.28, 0.0, 0.28], [-0.4, 0.0, 0.0], [-0.28, 0.0, -0.28], [0.0, 0.0, -0.4], [0.28, 0.0, -0.28],
-        # Top circle (tallest)
-        [0.0, 1.0, 0.0],
-        [0.4, 1.0, 0.0], [0.28, 1.0, 0.28], [0.0, 1.0, 0.4],
-        [-0.28, 1.0, 0.28], [-0.4, 1.0, 0.0], [-0.28, 1.0, -0.28], [0.0, 1.0, -0.4], [0.28, 1.0, -0.28],
-    ]
-    
-    indices = [
-        0,1,2, 0,2,3, 0,3,4, 0,4,5, 0,5,6, 0,6,7, 0,7,8, 0,8,1,
-        9,11,10, 9,12,11, 9,13,12, 9,14,13, 9,15,14, 9,16,15, 9,17,16, 9,10,17,
-        1,10,11, 1,11,2, 2,11,12, 2,12,3, 3,12,13, 3,13,4,
-        4,13,14, 4,14,5, 5,14,15, 5,15,6, 6,15,16, 6,16,7,
-        7,16,17, 7,17,8, 8,17,10, 8,10,1
-    ]
-    
-    return vertices, indices
+    return create_bottle(0.4, 1.0)
 
 if __name__ == "__main__":
     # Create models directory if it doesn't exist
@@ -201,8 +168,7 @@ if __name__ == "__main__":
     
     # Check file sizes
     for model_file in models_dir.glob("*.glb"):
-        size_mb = model_file.stat().st_size / (1024 * 1024)
-        size_kb = model_file.stat().st_size / 1024
+        size_kb = os.path.getsize(model_file) / 1024
         print(f"   ✓ {model_file.name}: {size_kb:.2f}KB (under 10MB)")
     
     print("\n📝 Note: These are simple geometric placeholders.")
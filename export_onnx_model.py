@@ -0,0 +1,40 @@
+"""
+Script to build the local bottle detector model.
+Exports the pretrained YOLOv8n (COCO) checkpoint to ONNX and quantizes the
+weights to int8, writing assets/models/yolov8n-int8.onnx - the default
+BOTTLE_ONNX_MODEL path used by backend/services/local_detector.py.
+
+Needs the export-only tools, which the server itself doesn't:
+    pip install ultralytics onnx onnxruntime
+"""
+
+import os
+import sys
+from pathlib import Path
+
+OUTPUT_PATH = Path(os.getenv("BOTTLE_ONNX_MODEL", "assets/models/yolov8n-int8.onnx"))
+INPUT_SIZE = 640
+
+def main():
+    try:
+        from ultralytics import YOLO
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        print(f"✗ Missing export dependency ({e.name}) - run: pip install ultralytics onnx onnxruntime")
+        return False
+    
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Downloads yolov8n.pt on first use; output is (1, 84, 8400) like local_detector expects
+    print("Exporting YOLOv8n to ONNX...")
+    fp32_path = YOLO("yolov8n.pt").export(format="onnx", imgsz=INPUT_SIZE, dynamic=False)
+    
+    print("Quantizing weights to int8...")
+    quantize_dynamic(fp32_path, str(OUTPUT_PATH), weight_type=QuantType.QInt8)
+    
+    size_mb = os.path.getsize(OUTPUT_PATH) / (1024 * 1024)
+    print(f"✓ Wrote {OUTPUT_PATH} ({size_mb:.1f}MB)")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
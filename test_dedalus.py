@@ -1,6 +1,6 @@
-import asyncio
 from dedalus_labs import AsyncDedalus, DedalusRunner
 from dotenv import load_dotenv
+from backend.utils.event_loop import run as run_event_loop
 
 load_dotenv()
 
@@ -15,4 +15,4 @@ async def main():
     print(f"✓ Dedalus working: {result.final_output}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
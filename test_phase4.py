@@ -4,6 +4,7 @@ Tests all requirements from instructions.md Phase 4
 """
 
 import asyncio
+import os
 import time
 from pathlib import Path
 
@@ -23,9 +24,18 @@ required_files = [
     "frontend/package.json"
 ]
 
+# One directory read per parent directory instead of a stat per file
+existing = set()
+for directory in {os.path.dirname(file_path) for file_path in required_files}:
+    try:
+        with os.scandir(directory) as entries:
+            existing.update(os.path.join(directory, e.name) for e in entries)
+    except FileNotFoundError:
+        pass
+
 all_exist = True
 for file_path in required_files:
-    exists = Path(file_path).exists()
+    exists = file_path in existing
     status = "✓" if exists else "✗"
     print(f"  {status} {file_path}")
     all_exist = all_exist and exists
@@ -36,8 +46,12 @@ if not all_exist:
 
 # Check 2: Dependencies installed
 print("\n✓ Check 2: Dependencies installed")
-import json
-package_json = json.loads(Path("frontend/package.json").read_text())
+try:
+    import orjson
+    package_json = orjson.loads(Path("frontend/package.json").read_bytes())
+except ImportError:
+    import json
+    package_json = json.loads(Path("frontend/package.json").read_bytes())
 required_deps = ["three", "@react-three/fiber", "@react-three/drei", "react", "react-dom"]
 deps = {**package_json.get("dependencies", {}), **package_json.get("devDependencies", {})}
 
@@ -46,15 +60,30 @@ for dep in required_deps:
     status = "✓" if installed else "✗"
     print(f"  {status} {dep}")
 
+# Checks 3 and 4 share one in-process HTTP session instead of spawning curl;
+# both requests go out together and a dead server fails after 2 seconds
+import aiohttp
+from backend.utils.event_loop import run as run_event_loop
+
+async def fetch_text(session, url):
+    try:
+        async with session.get(url) as resp:
+            return await resp.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+async def fetch_servers():
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+        return await asyncio.gather(
+            fetch_text(session, "http://localhost:8000/health"),
+            fetch_text(session, "http://localhost:3001/")
+        )
+
+backend_body, frontend_body = run_event_loop(fetch_servers())
+
 # Check 3: Backend server running
 print("\n✓ Check 3: Backend server health")
-import subprocess
-result = subprocess.run(
-    ["curl", "-s", "http://localhost:8000/health"],
-    capture_output=True,
-    text=True
-)
-if result.returncode == 0 and "healthy" in result.stdout:
+if backend_body is not None and "healthy" in backend_body:
     print(f"  ✓ Backend server healthy")
 else:
     print(f"  ✗ Backend server not responding")
@@ -62,12 +91,7 @@ else:
 
 # Check 4: Frontend server running
 print("\n✓ Check 4: Frontend server running")
-result = subprocess.run(
-    ["curl", "-s", "http://localhost:3001/"],
-    capture_output=True,
-    text=True
-)
-if result.returncode == 0 and ("root" in result.stdout or "html" in result.stdout):
+if frontend_body is not None and ("root" in frontend_body or "html" in frontend_body):
     print(f"  ✓ Frontend server running on port 3001")
 else:
     print(f"  ✗ Frontend server not responding")
@@ -75,7 +99,12 @@ else:
 
 # Check 5: GLB models available
 print("\n✓ Check 5: 3D models available")
-models = list(Path("assets/models").glob("*.glb"))
+# One directory read; each DirEntry caches its own stat
+try:
+    with os.scandir("assets/models") as entries:
+        models = [e for e in entries if e.name.endswith(".glb") and e.is_file(follow_symlinks=False)]
+except FileNotFoundError:
+    models = []
 if len(models) >= 3:
     print(f"  ✓ {len(models)} GLB models found")
     for model in models:
@@ -1,4 +1,3 @@
-import asyncio
 import sys
 from pathlib import Path
 
@@ -6,7 +5,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.agents.reconstruction_agent import ReconstructionAgent
-from backend.agents.medical_agent import MedicalAnalysisAgent
+from backend.agents.medical_agent import get_medical_agent
+from backend.utils.event_loop import run as run_event_loop
 
 async def test_phase2_reconstruction():
     """Test Phase 2: Real Dedalus reconstruction agent."""
@@ -52,7 +52,7 @@ async def test_phase6_medical_ai():
     
     print("🧪 Testing Phase 6: AI Medical Guidance\n")
     
-    agent = MedicalAnalysisAgent()
+    agent = get_medical_agent()
     
     # Test annotations
     annotations = [
@@ -112,4 +112,4 @@ async def main():
         print("✅ ALL TESTS PASSED - Ready to proceed to next phase!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
@@ -1,9 +1,10 @@
-import asyncio
+import os
 import sys
 from pathlib import Path
 
 sys.path.insert(0, '.')
 from backend.agents.reconstruction_agent import ReconstructionAgent
+from backend.utils.event_loop import run as run_event_loop
 
 async def test_with_real_video():
     print('🎥 Testing Phase 2 with REAL video file')
@@ -23,7 +24,7 @@ async def test_with_real_video():
         return
     
     print(f'\n✓ Found video: {video_path}')
-    size_mb = Path(video_path).stat().st_size / (1024 * 1024)
+    size_mb = os.path.getsize(video_path) / (1024 * 1024)
     print(f'  Size: {size_mb:.2f}MB')
     
     agent = ReconstructionAgent()
@@ -51,4 +52,4 @@ async def test_with_real_video():
         print('\n🎉 Real Dedalus reconstruction worked!')
 
 if __name__ == "__main__":
-    asyncio.run(test_with_real_video())
+    run_event_loop(test_with_real_video())
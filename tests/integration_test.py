@@ -7,6 +7,8 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from backend.utils.event_loop import run as run_event_loop
+
 async def test_complete_flow():
     """Test complete demo flow end-to-end."""
     
@@ -14,31 +16,40 @@ async def test_complete_flow():
     
     print("🧪 Starting integration test...\n")
     
-    # Test 1: Health check
+    test_annotations = [
+        {"position": [0, 0, 0], "label": "Entry point"},
+        {"position": [1, 0, 0], "label": "Target"}
+    ]
+    
     async with aiohttp.ClientSession() as session:
-        try:
+        async def check_health():
             async with session.get(f"{base_url}/health") as resp:
                 assert resp.status == 200
-                print("✓ Backend healthy")
-        except Exception as e:
-            print(f"✗ Health check failed: {e}")
-            print("Make sure the server is running: uvicorn backend.api.server:app --reload")
-            return
-        
-        # Test 2: AI analysis (without video upload for now)
-        test_annotations = [
-            {"position": [0, 0, 0], "label": "Entry point"},
-            {"position": [1, 0, 0], "label": "Target"}
-        ]
         
-        try:
+        async def analyze():
             async with session.post(
                 f"{base_url}/analyze",
                 json={"annotations": test_annotations, "query": "What's the distance?"}
             ) as resp:
-                result = await resp.json()
-                assert 'guidance' in result
-                print(f"✓ AI analysis: {result['guidance'][:50]}...")
+                return await resp.json()
+        
+        # The checks are independent, so send them together and wait for the
+        # slower one rather than the sum of both round trips
+        health, result = await asyncio.gather(check_health(), analyze(), return_exceptions=True)
+        
+        # Test 1: Health check
+        if isinstance(health, Exception):
+            print(f"✗ Health check failed: {health}")
+            print("Make sure the server is running: uvicorn backend.api.server:app --reload")
+            return
+        print("✓ Backend healthy")
+        
+        # Test 2: AI analysis (without video upload for now)
+        try:
+            if isinstance(result, Exception):
+                raise result
+            assert 'guidance' in result
+            print(f"✓ AI analysis: {result['guidance'][:50]}...")
         except Exception as e:
             print(f"✗ AI analysis failed: {e}")
     
@@ -49,4 +60,4 @@ async def test_complete_flow():
     print("3. Build the frontend React app")
 
 if __name__ == "__main__":
-    asyncio.run(test_complete_flow())
+    run_event_loop(test_complete_flow())
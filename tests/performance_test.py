@@ -1,4 +1,4 @@
-import asyncio
+import statistics
 import time
 import sys
 from pathlib import Path
@@ -6,7 +6,10 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.agents.medical_agent import MedicalAnalysisAgent
+from backend.agents.medical_agent import get_medical_agent
+from backend.utils.event_loop import run as run_event_loop
+
+BENCH_RUNS = 5
 
 async def benchmark_demo():
     """Measure timing of each demo component."""
@@ -16,16 +19,24 @@ async def benchmark_demo():
     timings = {}
     
     # Benchmark: AI analysis
-    medical = MedicalAnalysisAgent()
+    medical = get_medical_agent()
     
     annotations = [{"position": [0, 0, 0]}, {"position": [1, 0, 0]}]
-    start = time.time()
-    result = await medical.analyze_annotations(annotations, "distance?")
-    timings['ai_analysis'] = time.time() - start
+    
+    # One untimed warm-up call absorbs connection setup, then take the
+    # median of several runs
+    samples = []
+    for i in range(BENCH_RUNS + 1):
+        start = time.perf_counter()
+        result = await medical.analyze_annotations(annotations, "distance?")
+        if i:
+            samples.append(time.perf_counter() - start)
+    timings['ai_analysis'] = statistics.median(samples)
+    spread = statistics.stdev(samples) if len(samples) > 1 else 0.0
     
     # Print results
-    print("Timing Results:")
-    print(f"  AI Analysis:         {timings['ai_analysis']:.2f}s")
+    print(f"Timing Results (median of {BENCH_RUNS} runs):")
+    print(f"  AI Analysis:         {timings['ai_analysis']:.2f}s ± {spread:.2f}s")
     
     # Validate against requirements
     if timings['ai_analysis'] < 5:
@@ -34,4 +45,4 @@ async def benchmark_demo():
         print("\n⚠️ AI analysis slower than target (5s)")
 
 if __name__ == "__main__":
-    asyncio.run(benchmark_demo())
+    run_event_loop(benchmark_demo())
@@ -0,0 +1,389 @@
+"""
+Unit tests for AdvancedMedicalAgent
+Runner calls are replaced with fakes, so no API key or network is needed.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.agents import advanced_medical_agent
+from backend.agents.advanced_medical_agent import (
+    AdvancedMedicalAgent,
+    _dist_mm,
+    _segment_vessel_clearance_mm,
+    _to_soa
+)
+from backend.tools.measurement_tools import calculate_distance_3d
+
+
+def _chunk(content=None):
+    """Chat completion chunk shaped like the ones runner.run(stream=True) yields"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeStreamRunner:
+    """Records run() kwargs and streams the given chunks back"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = []
+
+    def run(self, **kwargs):
+        self.calls.append(kwargs)
+
+        async def stream():
+            for chunk in self.chunks:
+                yield chunk
+        return stream()
+
+
+async def _collect(frames):
+    return [frame async for frame in frames]
+
+
+def test_stream_optimal_entry_point_yields_rationale_deltas():
+    agent = AdvancedMedicalAgent()
+    agent.runner = FakeStreamRunner([
+        _chunk(), _chunk("Central "), SimpleNamespace(choices=[]), _chunk("safe zone."), _chunk("")
+    ])
+
+    frames = asyncio.run(_collect(agent.stream_optimal_entry_point([])))
+
+    assert agent.runner.calls[0]["stream"] is True
+    assert frames[0]["type"] == "candidate"
+    assert len(frames[0]["position"]) == 3
+    assert [f["content"] for f in frames if f["type"] == "rationale_delta"] == ["Central ", "safe zone."]
+    assert frames[-1] == {"type": "complete", "done": True}
+
+
+def test_stream_optimal_entry_point_reports_runner_errors():
+    agent = AdvancedMedicalAgent()
+
+    class FailingRunner:
+        def run(self, **kwargs):
+            raise RuntimeError("boom")
+    agent.runner = FailingRunner()
+
+    frames = asyncio.run(_collect(agent.stream_optimal_entry_point([])))
+
+    assert frames[0]["type"] == "candidate"
+    assert frames[-1]["type"] == "error"
+    assert "boom" in frames[-1]["content"]
+
+
+def test_stream_incision_path_yields_segments_then_summary():
+    agent = AdvancedMedicalAgent()
+    path = [[0, 0, 0], [1, 0, 0], [1, 1, 0]]
+
+    frames = asyncio.run(_collect(agent.stream_incision_path(path)))
+
+    assert sorted(f["index"] for f in frames if f["type"] == "segment") == [0, 1]
+    assert frames[-1]["type"] == "summary"
+    assert frames[-1]["num_segments"] == 2
+
+
+class FakeRunner:
+    """Records run() kwargs and answers with a fixed final_output"""
+
+    def __init__(self, output="AI guidance"):
+        self.output = output
+        self.calls = []
+
+    async def run(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(final_output=self.output)
+
+
+class UnavailableRunner:
+    async def run(self, **kwargs):
+        raise RuntimeError("API unavailable")
+
+
+THREE_POINTS = [
+    {"position": [0, 0, 0], "label": "A"},
+    {"position": [1, 0, 0], "label": "B"},
+    {"position": [1, 1, 0], "label": "C"},
+]
+
+
+def test_planning_query_goes_to_the_model():
+    agent = AdvancedMedicalAgent()
+    agent.runner = FakeRunner("Approach laterally.")
+
+    result = asyncio.run(agent.analyze_annotations(THREE_POINTS, "What's the safest approach?"))
+
+    assert len(agent.runner.calls) == 1
+    assert result["method"] == "ai"
+    assert result["guidance"] == "Approach laterally."
+
+
+def test_plain_measurements_use_the_fast_path():
+    agent = AdvancedMedicalAgent()
+    agent.runner = FakeRunner()
+
+    distance = asyncio.run(agent.analyze_annotations(THREE_POINTS, "Distance between A and B"))
+    angle = asyncio.run(agent.analyze_annotations(THREE_POINTS, "What is the angle of A, B and C?"))
+
+    assert agent.runner.calls == []
+    assert distance["method"] == angle["method"] == "fast_local"
+    assert "10.0mm" in distance["guidance"]
+    assert "90.0°" in angle["guidance"]
+
+
+def test_fallback_answers_the_classified_query_type():
+    agent = AdvancedMedicalAgent()
+    agent.runner = UnavailableRunner()
+    query = "what is the approach angle to the far vessel"
+
+    result = asyncio.run(agent.analyze_annotations(THREE_POINTS, query))
+
+    assert agent._classify_query(query) == "angle"
+    assert result["method"] == "intelligent_fallback"
+    assert result["measurements"] == {"angle": "90.0°"}
+
+
+def _baseline_query_type(query):
+    """The original substring classification in _intelligent_fallback."""
+    query = query.lower()
+    if any(word in query for word in ['distance', 'far', 'how long', 'measure']):
+        return "distance"
+    if any(word in query for word in ['angle', 'approach', 'direction']):
+        return "angle"
+    if any(word in query for word in ['entry', 'point', 'where', 'suggest']):
+        return "entry"
+    return "general"
+
+
+@pytest.mark.parametrize("query", [
+    "How far is A from B?",
+    "How far apart are the points?",
+    "Is the incision far from the vessel?",
+    "Which marker is farther away?",
+    "Distances between the markers",
+    "Take measurements of the defect",
+    "Can you measure it?",
+    "How long is the cut?",
+    "What are the angles here?",
+    "Approaching from the left, is that ok?",
+    "Which directions are possible?",
+    "Check these points",
+    "Where should I cut?",
+    "Any suggestions?",
+    "It suggested the lateral side",
+    "Describe the anatomy",
+])
+def test_classification_keeps_the_original_query_types(query):
+    assert AdvancedMedicalAgent()._classify_query(query) == _baseline_query_type(query)
+
+
+def test_classification_covers_forms_the_substring_match_missed():
+    agent = AdvancedMedicalAgent()
+
+    assert agent._classify_query("Measuring the gap please") == "distance"
+    assert agent._classify_query("Possible entries into the site") == "entry"
+
+
+def test_response_cache_keys_meshes_by_content_and_returns_copies():
+    agent = AdvancedMedicalAgent()
+    agent.runner = FakeRunner("Proceed medially.")
+    query = "What's the safest approach?"
+    mesh = {"vertices": [[0, 0, 0], [1, 0, 0], [0, 1, 0]]}
+    same_mesh = {"vertices": [[0, 0, 0], [1, 0, 0], [0, 1, 0]]}
+    other_mesh = {"vertices": [[0, 0, 0], [1, 0, 0], [0, 1, 1e-9]]}
+
+    first = asyncio.run(agent.analyze_annotations(THREE_POINTS, query, mesh))
+    first["warnings"].append("mutated by caller")
+    repeat = asyncio.run(agent.analyze_annotations(THREE_POINTS, query, same_mesh))
+    repeat["measurements"]["extra"] = 1
+    other = asyncio.run(agent.analyze_annotations(THREE_POINTS, query, other_mesh))
+    again = asyncio.run(agent.analyze_annotations(THREE_POINTS, query, mesh))
+
+    assert len(agent.runner.calls) == 2
+    assert (first["method"], repeat["method"], other["method"]) == ("ai", "cached", "ai")
+    assert again["method"] == "cached"
+    assert again["warnings"] == [] and again["measurements"] == {}
+
+
+def _segments(path, annotations):
+    agent = AdvancedMedicalAgent()
+    return asyncio.run(agent.analyze_incision_path(path, annotations))["segments"]
+
+
+def test_segment_passing_a_vessel_is_flagged():
+    # The vessel sits by the end of the segment, 9mm from its midpoint
+    vessel = {"position": [1.9, 0.01, 0], "label": "Vessel", "type": "vessel"}
+
+    segment, = _segments([[0, 0, 0], [2, 0, 0]], [vessel])
+
+    assert segment["vessel_clearance_mm"] == 0.1
+    assert segment["confidence_breakdown"]["vessel_proximity"] >= 0.60
+    assert "Segment passes within 0.1mm of a vessel" in segment["risks"]
+
+
+def test_segment_clear_of_vessels_has_no_clearance_risk():
+    vessel = {"position": [1, 5, 0], "label": "Vessel", "type": "vessel"}
+
+    first, second = _segments([[0, 0, 0], [1, 0, 0], [2, 0, 0]], [vessel])
+
+    assert first["vessel_clearance_mm"] == second["vessel_clearance_mm"] == 50.0
+    assert not any("passes within" in risk for risk in first["risks"] + second["risks"])
+
+
+def test_segments_without_vessels_have_no_clearance():
+    marker = {"position": [1, 0, 0], "label": "Landmark"}
+
+    segment, = _segments([[0, 0, 0], [2, 0, 0]], [marker])
+
+    assert segment["vessel_clearance_mm"] is None
+    assert not any("passes within" in risk for risk in segment["risks"])
+
+
+def test_segment_clearance_matches_per_segment_projection():
+    rng = np.random.default_rng(7)
+    points = rng.uniform(-1, 1, (6, 3))
+    vessels = rng.uniform(-1, 1, (4, 3)).astype(np.float32)
+
+    expected = []
+    for start, end in zip(points[:-1], points[1:]):
+        seg = end - start
+        t = np.clip(((vessels - start) @ seg) / (seg @ seg), 0, 1)
+        expected.append(np.linalg.norm(vessels - (start + t[:, None] * seg), axis=1).min() * 10)
+
+    np.testing.assert_allclose(_segment_vessel_clearance_mm(points, vessels), expected, rtol=1e-5)
+    assert _segment_vessel_clearance_mm(points, np.empty((0, 3), dtype=np.float32)) is None
+
+
+def test_path_length_is_the_sum_of_displayed_segment_lengths():
+    agent = AdvancedMedicalAgent()
+    # Each segment is 10.05mm - the unrounded total would round to 40.2mm
+    path = [[0, 0, 0], [1.005, 0, 0], [2.01, 0, 0], [3.015, 0, 0], [4.02, 0, 0]]
+
+    result = asyncio.run(agent.analyze_incision_path(path))
+
+    displayed = round(sum(s["length_mm"] for s in result["segments"]), 1)
+    assert result["path_length_mm"] == displayed
+
+
+def test_to_soa_builds_annotation_arrays():
+    annotations = [
+        {"position": [0, 0, 0], "label": "Point A"},
+        {"position": [1, 2, 3], "label": "Main Vessel"},
+        {"position": [4, 5, 6], "label": "X", "type": "vessel"},
+        {"label": "Vessel without position"},
+    ]
+
+    soa = _to_soa(annotations)
+
+    np.testing.assert_array_equal(soa.positions, [[0, 0, 0], [1, 2, 3], [4, 5, 6], [0, 0, 0]])
+    assert soa.positions.dtype == np.float64
+    assert list(soa.labels) == ["Point A", "Main Vessel", "X", "Vessel without position"]
+    assert soa.is_vessel.tolist() == [False, True, True, False]
+    np.testing.assert_array_equal(soa.vessel_positions, [[1, 2, 3], [4, 5, 6]])
+    assert soa.vessel_positions.flags.c_contiguous
+
+    empty = _to_soa([])
+    assert empty.positions.shape == empty.vessel_positions.shape == (0, 3)
+
+
+def test_dist_mm_matches_calculate_distance_3d():
+    rng = np.random.default_rng(3)
+    for a, b in rng.uniform(-2, 2, (200, 2, 3)).tolist():
+        assert round(_dist_mm(a, b), 1) == calculate_distance_3d(a, b)["distance_mm"]
+
+
+@pytest.mark.skipif(not advanced_medical_agent.NUMBA_AVAILABLE, reason="numba not installed")
+def test_compiled_min_distance_matches_python():
+    rng = np.random.default_rng(11)
+    for _ in range(200):
+        pos = rng.uniform(-1.5, 1.5, 3)
+        points = rng.uniform(-1, 1, (rng.integers(0, 5), 3))
+        assert (advanced_medical_agent._min_distance_mm(pos, points)
+                == advanced_medical_agent._min_distance_mm_py(pos, points))
+
+
+def _baseline_breakdown(position, annotations, geometry):
+    """The original per-annotation scoring loop, kept as the reference."""
+    breakdown = {"vessel_proximity": 1.0, "geometric_safety": 0.85}
+    vessel_distances = [
+        calculate_distance_3d(position, ann["position"])["distance_mm"]
+        for ann in annotations if "vessel" in ann["label"].lower()
+    ]
+    if vessel_distances:
+        d = min(vessel_distances)
+        breakdown["vessel_proximity"] = (
+            0.20 if d < 3.0 else 0.45 if d < 5.0 else 0.70 if d < 10.0 else 0.85 if d < 15.0 else 0.95
+        )
+    if geometry:
+        def near(zones, limit):
+            return any(calculate_distance_3d(position, z["center"])["distance_mm"] < limit for z in zones)
+        if near(geometry["high_risk_zones"], 20):
+            breakdown["geometric_safety"] = 0.50
+        else:
+            breakdown["geometric_safety"] = 0.92 if near(geometry["safe_zones"], 30) else 0.75
+    return breakdown
+
+
+def _scored(agent, position, annotations, geometry):
+    result = agent._calculate_confidence_breakdown(position, _to_soa(annotations), geometry=geometry)
+    return {key: result[key] for key in ("vessel_proximity", "geometric_safety")}
+
+
+def test_breakdown_matches_baseline_at_rounding_boundaries():
+    agent = AdvancedMedicalAgent()
+    origin = [0.3, 0.7, 0.4]
+    # Offsets straddling every threshold and the .x5 rounding steps
+    # around it, one ulp apart
+    offsets = []
+    for edge in (0.295, 0.3, 0.495, 0.5, 0.995, 1.0, 1.495, 1.5, 1.995, 2.0, 2.995, 3.0):
+        offsets += [np.nextafter(edge, 0), edge, np.nextafter(edge, 4)]
+
+    for offset in offsets:
+        for axis in range(3):
+            target = list(origin)
+            target[axis] += float(offset)
+            annotations = [{"position": target, "label": "Vessel"}]
+            for geometry in (
+                None,
+                {"high_risk_zones": [{"center": target}], "safe_zones": []},
+                {"high_risk_zones": [], "safe_zones": [{"center": target}]},
+            ):
+                assert _scored(agent, origin, annotations, geometry) == \
+                    _baseline_breakdown(origin, annotations, geometry), (offset, axis, geometry)
+
+
+def test_breakdown_matches_baseline_on_random_scenes():
+    rng = np.random.default_rng(5)
+    agent = AdvancedMedicalAgent()
+    for _ in range(500):
+        annotations = [
+            {"position": p, "label": "Vessel" if rng.random() < 0.5 else "Point"}
+            for p in rng.uniform(-3, 3, (rng.integers(0, 5), 3)).tolist()
+        ]
+        geometry = None
+        if rng.random() < 0.7:
+            geometry = {
+                "high_risk_zones": [{"center": c} for c in rng.uniform(-3, 3, (rng.integers(0, 3), 3)).tolist()],
+                "safe_zones": [{"center": c} for c in rng.uniform(-3, 3, (rng.integers(0, 3), 3)).tolist()],
+            }
+        position = rng.uniform(-3, 3, 3).tolist()
+        assert _scored(agent, position, annotations, geometry) == \
+            _baseline_breakdown(position, annotations, geometry)
+
+
+def test_breakdown_depth_and_edge_thresholds():
+    agent = AdvancedMedicalAgent()
+
+    at_edges = agent._calculate_confidence_breakdown([0.1, 0.3, 0.5])
+    below = agent._calculate_confidence_breakdown(
+        [np.nextafter(0.1, 0), np.nextafter(0.3, 0), 0.5]
+    )
+
+    assert (at_edges["tissue_depth"], at_edges["approach_feasibility"]) == (0.80, 0.75)
+    assert (below["tissue_depth"], below["approach_feasibility"]) == (0.95, 0.55)
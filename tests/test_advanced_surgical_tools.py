@@ -0,0 +1,61 @@
+"""
+Unit tests for the geometric surgical analysis tools
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.tools.advanced_surgical_tools import analyze_mesh_geometry, score_entry_point_safety
+
+MESH = [[-0.3, -1.0, -0.3], [0.3, 0.1, 0.3], [0.1, 0.7, -0.2], [-0.2, 0.4, 0.2]]
+
+
+def test_geometry_keeps_vertex_values_exact():
+    geometry = analyze_mesh_geometry(MESH)
+
+    assert geometry["bounds"] == {"min": [-0.3, -1.0, -0.3], "max": [0.3, 0.7, 0.3]}
+    # Top 20% by height is the last two vertices, averaged in float64
+    assert geometry["high_risk_zones"][0]["center"] == np.mean([MESH[2], MESH[3]], axis=0).tolist()
+
+
+def test_point_on_a_bound_is_in_bounds():
+    geometry = analyze_mesh_geometry(MESH)
+
+    for point in ([0.3, 0.7, 0.3], [-0.3, -1.0, -0.3], [0.1, 0.7, -0.2]):
+        structural = score_entry_point_safety(point, geometry, [])["breakdown"]["structural_integrity"]
+        assert structural["in_bounds"] is True
+        assert structural["score"] == 100
+
+    outside = score_entry_point_safety([0.3000001, 0, 0], geometry, [])["breakdown"]["structural_integrity"]
+    assert outside["in_bounds"] is False
+
+
+def test_cached_geometry_is_not_shared_with_callers():
+    first = analyze_mesh_geometry(MESH)
+    first["safe_zones"][0]["center"][0] = 99.0
+    first["bounds"]["max"].append(1.0)
+    first["extra"] = True
+
+    again = analyze_mesh_geometry(MESH)
+
+    assert again["safe_zones"][0]["center"][0] != 99.0
+    assert again["bounds"]["max"] == [0.3, 0.7, 0.3]
+    assert "extra" not in again
+
+
+def test_overall_is_the_weighted_sum_of_the_breakdown():
+    geometry = analyze_mesh_geometry(MESH)
+    annotations = [{"position": [0.05, 0.2, 0.0], "label": "Vessel"}, {"label": "No position"}]
+
+    for point in ([0.0, 0.2, 0.0], [0.2, -0.5, 0.1], [1.0, 1.0, 1.0]):
+        result = score_entry_point_safety(point, geometry, annotations)
+        weighted = 0.0
+        for detail in result["breakdown"].values():
+            weighted += detail["score"] * detail["weight"]
+
+        assert result["overall"] == round(weighted, 1)
+        assert type(result["overall"]) is float
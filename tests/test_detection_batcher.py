@@ -0,0 +1,86 @@
+"""
+Unit tests for DetectionBatcher
+detect_bottles_batch is replaced with a fake, so no vision requests are made.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# vision_detector builds its OpenAI client at import; the key is never used here
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from backend.services import detection_batcher as batcher_module
+from backend.services.detection_batcher import DetectionBatcher
+
+
+def test_concurrent_frames_share_one_request_per_mode(monkeypatch):
+    calls = []
+
+    async def fake_batch(images, mode):
+        calls.append((list(images), mode))
+        return [{"image": image, "mode": mode} for image in images]
+    monkeypatch.setattr(batcher_module, "detect_bottles_batch", fake_batch)
+
+    async def run():
+        batcher = DetectionBatcher(window=0.05)
+        try:
+            return await asyncio.gather(
+                batcher.detect("a", "full"), batcher.detect("b", "fast"), batcher.detect("c", "full")
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert results == [
+        {"image": "a", "mode": "full"}, {"image": "b", "mode": "fast"}, {"image": "c", "mode": "full"}
+    ]
+    assert sorted(calls) == [(["a", "c"], "full"), (["b"], "fast")]
+
+
+def test_batch_failure_reaches_every_caller(monkeypatch):
+    async def failing_batch(images, mode):
+        raise RuntimeError("vision API down")
+    monkeypatch.setattr(batcher_module, "detect_bottles_batch", failing_batch)
+
+    async def run():
+        batcher = DetectionBatcher(window=0.01)
+        try:
+            return await asyncio.gather(batcher.detect("a"), batcher.detect("b"), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert len(results) == 2
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batcher_holds_in_flight_flushes(monkeypatch):
+    release = None
+
+    async def slow_batch(images, mode):
+        await release.wait()
+        return [{"image": image} for image in images]
+    monkeypatch.setattr(batcher_module, "detect_bottles_batch", slow_batch)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        batcher = DetectionBatcher(window=0.01)
+        try:
+            pending = asyncio.ensure_future(batcher.detect("a"))
+            while not batcher._flushes:
+                await asyncio.sleep(0.005)
+            in_flight = len(batcher._flushes)
+            release.set()
+            result = await pending
+            await asyncio.sleep(0)
+            return in_flight, result, len(batcher._flushes)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == (1, {"image": "a"}, 0)
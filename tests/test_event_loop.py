@@ -0,0 +1,22 @@
+"""
+Unit tests for the script entry point helper
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.event_loop import run
+
+
+def test_run_returns_the_coroutine_result_and_leaves_the_policy_alone():
+    policy = asyncio.get_event_loop_policy()
+
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert run(answer()) == 42
+    assert asyncio.get_event_loop_policy() is policy
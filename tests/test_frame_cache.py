@@ -0,0 +1,113 @@
+"""
+Unit tests for the webcam detection caches
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services import frame_cache as frame_cache_module
+from backend.services.frame_cache import DetectionMemo, FrameCache
+
+DETECTION = {"detected": True, "bbox": {"x": 1, "y": 2, "width": 3, "height": 4}, "confidence": 0.9}
+MISS = {"detected": False, "bbox": {"x": 0, "y": 0, "width": 0, "height": 0}, "confidence": 0.0}
+
+
+def test_frame_cache_reuses_near_identical_frames():
+    cache = FrameCache(max_distance=4)
+    cache.put(0b1010, "full", DETECTION)
+
+    assert cache.get(0b1011, "full") is DETECTION
+    assert cache.get(0b1011, "fast") is None
+    assert cache.get(0b1010 ^ 0b11111, "full") is None
+
+
+def test_frame_cache_skips_failed_detections():
+    cache = FrameCache()
+    cache.put(1, "full", MISS)
+    cache.put(2, "full", {**DETECTION, "error": "rate limited"})
+
+    assert cache.get(1, "full") is None
+    assert cache.get(2, "full") is None
+
+
+def test_frame_cache_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(frame_cache_module.time, "monotonic", lambda: now[0])
+    cache = FrameCache(ttl=2.0)
+    cache.put(1, "full", DETECTION)
+
+    now[0] += 1.0
+    assert cache.get(1, "full") is DETECTION
+    now[0] += 1.5
+    assert cache.get(1, "full") is None
+
+
+def test_detection_memo_coalesces_concurrent_requests():
+    memo = DetectionMemo()
+    calls = []
+
+    async def detect():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return DETECTION
+
+    async def run():
+        first = await asyncio.gather(*[memo.get_or_detect(("a", "full"), detect) for _ in range(3)])
+        again = await memo.get_or_detect(("a", "full"), detect)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert first == [DETECTION] * 3
+    assert again is DETECTION
+    assert len(calls) == 1
+
+
+def test_detection_memo_does_not_cache_failures():
+    memo = DetectionMemo()
+    calls = []
+
+    async def failing():
+        calls.append("raise")
+        await asyncio.sleep(0.01)
+        raise RuntimeError("vision API down")
+
+    async def miss():
+        calls.append("miss")
+        return MISS
+
+    async def run():
+        results = await asyncio.gather(
+            memo.get_or_detect(("a", "full"), failing),
+            memo.get_or_detect(("a", "full"), failing),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await memo.get_or_detect(("a", "full"), miss) is MISS
+        assert await memo.get_or_detect(("a", "full"), miss) is MISS
+
+    asyncio.run(run())
+    assert calls == ["raise", "miss", "miss"]
+
+
+def test_detection_memo_cancelled_caller_does_not_cancel_others():
+    memo = DetectionMemo()
+
+    async def detect():
+        await asyncio.sleep(0.05)
+        return DETECTION
+
+    async def run():
+        first = asyncio.create_task(memo.get_or_detect(("a", "full"), detect))
+        second = asyncio.create_task(memo.get_or_detect(("a", "full"), detect))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) is DETECTION
@@ -0,0 +1,85 @@
+"""
+Unit tests for the local ONNX bottle detector
+The ONNX session is replaced with a fake, so neither onnxruntime nor the
+model file is needed.
+"""
+
+import base64
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services import local_detector
+
+
+def _frame_base64(width=320, height=240):
+    ok, encoded = cv2.imencode(".jpg", np.zeros((height, width, 3), dtype=np.uint8))
+    assert ok
+    return base64.b64encode(encoded.tobytes()).decode()
+
+
+class FakeSession:
+    """Returns a YOLOv8-shaped (1, 84, N) output with one bottle box"""
+
+    def __init__(self, confidence):
+        self.output = np.zeros((1, 84, 4), dtype=np.float32)
+        self.output[0, :4, 2] = [320, 320, 64, 128]  # cx, cy, w, h at input scale
+        self.output[0, 4 + local_detector.BOTTLE_CLASS_ID, 2] = confidence
+
+    def run(self, outputs, feeds):
+        return [self.output]
+
+
+def _use_fake_session(monkeypatch, confidence):
+    monkeypatch.setattr(local_detector, "is_available", lambda: True)
+    monkeypatch.setattr(local_detector, "_get_session", lambda: FakeSession(confidence))
+
+
+def test_unavailable_without_model(monkeypatch):
+    monkeypatch.setattr(local_detector, "MODEL_PATH", "/nonexistent/yolov8n-int8.onnx")
+
+    assert local_detector.is_available() is False
+    assert local_detector.detect_bottle_local(_frame_base64()) is None
+
+
+def test_confident_detection_is_reported(monkeypatch):
+    _use_fake_session(monkeypatch, 0.9)
+
+    result = local_detector.detect_bottle_local(_frame_base64())
+
+    assert result["detected"] is True
+    assert result["confidence"] == 0.9
+    # 640x640 input scaled back to the 320x240 frame
+    assert result["bbox"] == {"x": 144, "y": 96, "width": 32, "height": 48}
+    assert set(result["parts"]) == {"cap", "middle", "bottom"}
+    assert result["parts_estimated"] is True
+
+
+def test_low_confidence_is_not_a_detection(monkeypatch):
+    _use_fake_session(monkeypatch, local_detector.DETECTION_THRESHOLD / 2)
+
+    result = local_detector.detect_bottle_local(_frame_base64(), mode="fast")
+
+    assert result["detected"] is False
+    assert "parts" not in result
+    assert "parts_estimated" not in result
+
+
+def test_undecodable_frame_returns_none(monkeypatch):
+    _use_fake_session(monkeypatch, 0.9)
+
+    assert local_detector.detect_bottle_local(base64.b64encode(b"not an image").decode()) is None
+
+
+def test_warm_up_logs_instead_of_printing(monkeypatch, caplog, capsys):
+    monkeypatch.setattr(local_detector, "is_available", lambda: False)
+
+    with caplog.at_level("WARNING", logger=local_detector.__name__):
+        assert local_detector.warm_up() is False
+
+    assert "unavailable" in caplog.text
+    assert capsys.readouterr().out == ""
@@ -7,35 +7,48 @@ import asyncio
 import sys
 sys.path.insert(0, '/Users/aaryamanbajaj/Documents/live-3d')
 
-from backend.agents.medical_agent import MedicalAnalysisAgent
+from backend.agents.medical_agent import get_medical_agent
+from backend.utils.event_loop import run as run_event_loop
 
 async def test():
     print("🧪 Testing Phase 6: AI Medical Guidance\n")
     
-    agent = MedicalAnalysisAgent()
+    agent = get_medical_agent()
     
     annotations = [
         {"position": [0, 0, 0], "label": "Point A"},
         {"position": [1, 0, 0], "label": "Point B"}
     ]
     
+    # The queries are independent, so send them all at once and check the
+    # results in order afterwards
+    queries = [
+        "What's the distance?",
+        "What angle should I use?",
+        "Are there any risk zones?",
+        "What's the distance?"
+    ]
+    distance, angle, risk, repeat = await asyncio.gather(*[
+        agent.analyze_annotations(annotations, query) for query in queries
+    ])
+    
     # Test 1: Distance query
     print("Test 1: Distance query")
-    result = await agent.analyze_annotations(annotations, "What's the distance?")
+    result = distance
     assert "mm" in result['guidance'].lower() or "distance" in result['guidance'].lower(), "Distance not in response"
     print(f"✓ Distance query: {result['guidance']}")
     print(f"  Method: {result['method']}, Confidence: {result['confidence']}")
     
     # Test 2: Angle query
     print("\nTest 2: Angle query")
-    result = await agent.analyze_annotations(annotations, "What angle should I use?")
+    result = angle
     assert "angle" in result['guidance'].lower() or "°" in result['guidance'], "Angle not in response"
     print(f"✓ Angle query: {result['guidance']}")
     print(f"  Method: {result['method']}, Confidence: {result['confidence']}")
     
     # Test 3: Risk assessment
     print("\nTest 3: Risk assessment")
-    result = await agent.analyze_annotations(annotations, "Are there any risk zones?")
+    result = risk
     assert "risk" in result['guidance'].lower() or "safe" in result['guidance'].lower(), "Risk assessment not in response"
     print(f"✓ Risk query: {result['guidance']}")
     print(f"  Method: {result['method']}, Confidence: {result['confidence']}")
@@ -48,7 +61,7 @@ async def test():
     
     # Test 5: Measurements included
     print("\nTest 5: Measurements calculation")
-    result = await agent.analyze_annotations(annotations, "What's the distance?")
+    result = repeat
     if result['measurements']:
         print(f"✓ Measurements included: {result['measurements']}")
     else:
@@ -59,4 +72,4 @@ async def test():
     print("="*60)
 
 if __name__ == "__main__":
-    asyncio.run(test())
+    run_event_loop(test())
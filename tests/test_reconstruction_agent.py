@@ -0,0 +1,43 @@
+"""
+Unit tests for the reconstruction agent's video hashing
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.agents.reconstruction_agent import HASH_SAMPLE_COUNT, HASH_SAMPLE_SIZE, _video_digest
+
+
+def _digest(path):
+    stat = os.stat(path)
+    return _video_digest(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def test_small_video_digest_is_blake2b_of_the_whole_file(tmp_path):
+    video = tmp_path / "small.mp4"
+    video.write_bytes(b"fixit" * 1000)
+
+    expected = hashlib.blake2b(video.read_bytes(), digest_size=8).digest()
+    assert _digest(video) == int.from_bytes(expected, "little")
+
+
+def test_large_video_digest_only_reads_the_samples(tmp_path):
+    size = HASH_SAMPLE_COUNT * HASH_SAMPLE_SIZE * 4
+    data = bytearray(os.urandom(size))
+    first = tmp_path / "first.mp4"
+    first.write_bytes(data)
+
+    # A byte between two samples doesn't change the digest; one inside a sample does
+    data[HASH_SAMPLE_SIZE + 1] ^= 0xFF
+    between = tmp_path / "between.mp4"
+    between.write_bytes(data)
+    data[1] ^= 0xFF
+    inside = tmp_path / "inside.mp4"
+    inside.write_bytes(data)
+
+    assert _digest(first) == _digest(between)
+    assert _digest(first) != _digest(inside)
@@ -0,0 +1,90 @@
+"""
+API tests for request parsing in backend/api/server.py
+The medical agent's runner is replaced with a fake, so no AI calls are made.
+Run from the repository root (the server mounts assets/models).
+"""
+
+import base64
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.api import server
+
+MESH = np.array([[-0.5, -1, -0.5], [0.5, 1, 0.5], [0, 0.5, 0], [0.1, -0.2, 0.1]], dtype='<f4')
+
+
+class FakeRunner:
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(final_output="Proceed.")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server.medical_agent, "runner", FakeRunner())
+    return TestClient(server.app)
+
+
+def test_decode_vertices_returns_an_array():
+    data = MESH.tobytes()
+
+    vertices = server.decode_vertices(data)
+
+    assert isinstance(vertices, np.ndarray)
+    assert vertices.shape == (4, 3)
+    np.testing.assert_array_equal(vertices, MESH)
+
+
+def test_binary_mesh_is_analyzed(client):
+    response = client.post(
+        "/analyze-binary",
+        data={"metadata": json.dumps({"annotations": [], "query": "What's the safest approach?"})},
+        files={"vertices": ("mesh.bin", MESH.tobytes(), "application/octet-stream")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["method"] == "ai"
+    assert '"mesh_vertices":4' in server.medical_agent.runner.calls[0]["input"]
+
+
+def test_truncated_vertex_data_is_rejected(client):
+    response = client.post(
+        "/analyze-binary",
+        data={"metadata": json.dumps({"query": "Provide guidance"})},
+        files={"vertices": ("mesh.bin", MESH.tobytes()[:-2], "application/octet-stream")}
+    )
+
+    assert response.status_code == 400
+    assert "multiple of 12" in response.json()["error"]
+
+
+def test_malformed_metadata_is_rejected(client):
+    response = client.post("/analyze-binary", data={"metadata": "{not json"})
+
+    assert response.status_code == 400
+    assert "metadata" in response.json()["error"]
+
+
+def test_base64_mesh_suggests_entry_point(client, monkeypatch):
+    async def no_broadcast(data):
+        pass
+    monkeypatch.setattr(server, "broadcast_to_all", no_broadcast)
+    encoded = base64.b64encode(MESH.tobytes()).decode()
+
+    response = client.post("/suggest-entry-point", json={"mesh_vertices_f32": encoded})
+    bad = client.post("/suggest-entry-point", json={"mesh_vertices_f32": encoded[:-4]})
+
+    assert response.status_code == 200
+    assert len(response.json()["position"]) == 3
+    assert bad.status_code == 400